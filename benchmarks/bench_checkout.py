@@ -0,0 +1,74 @@
+"""Checkout latency against cart size: per-line INSERTs vs one executemany.
+
+    python benchmarks/bench_checkout.py [--rtt-ms 20] [--repeat 20]
+
+POSTs carts of 1, 10 and 50 lines to the real /create_order view through the test
+client. The database is a stand-in connection that sleeps --rtt-ms per round trip.
+"per-line" makes executemany cost one round trip per row, which is what the old
+execute-per-line loop sent. "executemany" costs one round trip, as MySQLdb's
+multi-row INSERT does.
+
+Result (stand-in, 20 ms round trip, 20 checkouts each). The round trips are the order
+INSERT, the item INSERTs, three rollup statements, the version bump, commit, and the
+pool's rollback on release:
+
+      lines       per-line p50 / p99      executemany p50 / p99   round trips
+          1         165.7 /  172.2 ms           169.1 /  181.8 ms        8 -> 8
+         10         349.8 /  364.4 ms           164.0 /  173.0 ms       17 -> 8
+         50        1156.4 / 1174.9 ms           166.1 /  181.4 ms       57 -> 8
+"""
+import argparse
+import time
+from datetime import datetime
+
+from common import StandInPool, mainapp, percentile, select_columns
+
+MENU = [{"id": n, "name": f"Dish {n}", "category": "Mains", "price": 100 + n, "description": "",
+         "image": None, "updated_at": datetime(2025, 1, 1)} for n in range(1, 51)]
+
+
+def responder(sql, params):
+    columns = select_columns(sql)
+    if 'FROM menu_items' in sql:
+        return columns, [tuple(m[c] for c in columns) for m in MENU]
+    return columns, []
+
+
+def run(size, batch, rtt, repeat):
+    pool = StandInPool(connection_kwargs=dict(rtt=rtt, responder=responder, batch_executemany=batch),
+                       max_size=4)
+    mainapp.mysql.pool = pool
+    mainapp.menu_catalog.invalidate()
+    client = mainapp.app.test_client()
+    cart = [{"name": MENU[n % len(MENU)]['name'], "qty": 1 + n % 3} for n in range(size)]
+
+    client.post('/create_order', json={"cart": cart})  # warm the menu catalog
+    samples, round_trips = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        resp = client.post('/create_order', json={"cart": cart})
+        samples.append(time.perf_counter() - started)
+        assert resp.status_code in (200, 201) and resp.get_json()['success'], resp.get_data()
+        conn = pool._idle[-1][0]
+        round_trips, conn.round_trips = conn.round_trips, 0
+    return samples, round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt-ms', type=float, default=20.0)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'lines':>11}{'per-line p50 / p99':>25}{'executemany p50 / p99':>27}{'round trips':>14}")
+    for size in (1, 10, 50):
+        before, before_trips = run(size, False, args.rtt_ms / 1000, args.repeat)
+        after, after_trips = run(size, True, args.rtt_ms / 1000, args.repeat)
+        print(f"{size:>11}"
+              f"{percentile(before, 50) * 1000:>14.1f} / {percentile(before, 99) * 1000:>6.1f} ms"
+              f"{percentile(after, 50) * 1000:>16.1f} / {percentile(after, 99) * 1000:>6.1f} ms"
+              f"{before_trips:>9} -> {after_trips}")
+
+
+if __name__ == '__main__':
+    main()
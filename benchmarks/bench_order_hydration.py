@@ -0,0 +1,96 @@
+"""Queries per /chef/orders request: the old per-order item lookup vs fetch_orders_with_items.
+
+    python benchmarks/bench_order_hydration.py [--items-per-order 3] [--rtt-ms 30]
+
+Runs both against a stand-in cursor holding N orders and counts the statements each
+sends. The time column is queries x --rtt-ms, the network time to a remote MySQL; the
+stand-in itself does not sleep here.
+
+Result (stand-in, 3 items per order, 30 ms round trip):
+
+     orders   old queries   new queries    old time    new time
+         10            11             2       0.33s       0.06s
+        100           101             2       3.03s       0.06s
+       1000          1001             2      30.03s       0.06s
+       5000          5001             2     150.03s       0.06s
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from common import StandInConnection, mainapp, select_columns
+
+
+def make_data(order_count, items_per_order):
+    start = datetime(2025, 1, 1, 12, 0)
+    orders, items = [], {}
+    next_item = 1
+    for order_id in range(1, order_count + 1):
+        orders.append({
+            "id": order_id, "customer_name": f"Guest {order_id}", "customer_email": None,
+            "subtotal": 300, "discount_amount": 0, "final_total": 300, "payment_status": "paid",
+            "current_status": "placed", "table_no": order_id % 20,
+            "created_at": start + timedelta(minutes=order_id), "updated_at": start + timedelta(minutes=order_id)
+        })
+        items[order_id] = []
+        for n in range(items_per_order):
+            items[order_id].append({"id": next_item, "order_id": order_id, "item_name": f"Dish {n}",
+                                    "qty": 1, "unit_price": 100, "total_price": 100})
+            next_item += 1
+    return orders, items
+
+
+def make_responder(orders, items):
+    def responder(sql, params):
+        columns = select_columns(sql)
+        if 'FROM order_items' in sql:
+            order_ids = params
+            rows = [i for order_id in order_ids for i in items.get(order_id, [])]
+        elif 'FROM orders' in sql:
+            rows = orders
+        else:
+            rows = []
+        return columns, [tuple(r[c] for c in columns) for r in rows]
+    return responder
+
+
+def old_chef_list_orders(cursor):
+    """The loop chef_list_orders ran before the hydration layer (status=all)."""
+    cursor.execute(
+        "SELECT id, customer_name, subtotal, final_total, payment_status, current_status, created_at FROM orders ORDER BY created_at ASC"
+    )
+    orders = [mainapp.dict_from_row(cursor, r) for r in cursor.fetchall()]
+    for o in orders:
+        cursor.execute("SELECT id, item_name, qty, unit_price, total_price FROM order_items WHERE order_id = %s", (o['id'],))
+        o['items'] = [mainapp.dict_from_row(cursor, row) for row in cursor.fetchall()]
+    return orders
+
+
+def new_chef_list_orders(cursor):
+    return mainapp.fetch_orders_with_items(cursor, order_by="created_at ASC, id ASC")
+
+
+def queries(fn, responder):
+    conn = StandInConnection(responder=responder)
+    orders = fn(conn.cursor())
+    return conn.round_trips, orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items-per-order', type=int, default=3)
+    parser.add_argument('--rtt-ms', type=float, default=30.0)
+    args = parser.parse_args()
+
+    print(f"{'orders':>11}{'old queries':>14}{'new queries':>14}{'old time':>12}{'new time':>12}")
+    for order_count in (10, 100, 1000, 5000):
+        responder = make_responder(*make_data(order_count, args.items_per_order))
+        old_n, old_orders = queries(old_chef_list_orders, responder)
+        new_n, new_orders = queries(new_chef_list_orders, responder)
+        assert [[i['id'] for i in o['items']] for o in old_orders] == \
+               [[i['id'] for i in o['items']] for o in new_orders], "item lists differ"
+        print(f"{order_count:>11}{old_n:>14}{new_n:>14}"
+              f"{old_n * args.rtt_ms / 1000:>11.2f}s{new_n * args.rtt_ms / 1000:>11.2f}s")
+
+
+if __name__ == '__main__':
+    main()
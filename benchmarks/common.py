@@ -0,0 +1,175 @@
+# benchmarks/common.py
+# Shared setup for the benchmark scripts: imports mainapp against a local database and
+# provides a stand-in MySQL connection that simulates network round trips.
+import os
+import re
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mainapp initializes its schema on import: never let a benchmark touch the configured
+# (production) database. BENCH_MYSQL_* select a local one; the stand-in benchmarks work
+# without any server (initialization then fails and is skipped).
+os.environ['MYSQL_HOST'] = os.getenv('BENCH_MYSQL_HOST', '127.0.0.1')
+os.environ['MYSQL_PORT'] = os.getenv('BENCH_MYSQL_PORT', '3306')
+os.environ['MYSQL_USER'] = os.getenv('BENCH_MYSQL_USER', 'root')
+os.environ['MYSQL_PASSWORD'] = os.getenv('BENCH_MYSQL_PASSWORD', '')
+os.environ['MYSQL_DB'] = os.getenv('BENCH_MYSQL_DB', 'restaurant_bench')
+os.environ.pop('REDIS_URL', None)
+
+sys.path.insert(0, ROOT)
+import mainapp  # noqa: E402
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a list of numbers (p in 0..100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def select_columns(sql):
+    """Output column names of a simple SELECT (alias, else the last dotted name)."""
+    match = re.search(r"\bSELECT\b(.*?)\bFROM\b", sql, re.S | re.I)
+    if not match:
+        return []
+    columns, depth, current = [], 0, ''
+    for ch in match.group(1):
+        depth += ch == '('
+        depth -= ch == ')'
+        if ch == ',' and depth == 0:
+            columns.append(current)
+            current = ''
+        else:
+            current += ch
+    columns.append(current)
+    names = []
+    for column in columns:
+        alias = re.search(r"\bAS\s+(\w+)\s*$", column.strip(), re.I)
+        names.append(alias.group(1) if alias else column.strip().split('.')[-1])
+    return names
+
+
+def default_responder(sql, params):
+    """One row of zeros for SELECTs (aggregates and counts), nothing otherwise."""
+    columns = select_columns(sql)
+    return columns, [tuple(0 for _ in columns)] if columns else []
+
+
+class StandInCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.conn.round_trip(sql)
+        columns, rows = self.conn.responder(sql, tuple(params or ()))
+        self.description = [(c,) for c in columns] if columns else None
+        self._rows = list(rows)
+        self.rowcount = len(self._rows) if columns else 1
+        if sql.lstrip().upper().startswith('INSERT'):
+            self.lastrowid = self.conn.next_id()
+        return self.rowcount
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        if self.conn.batch_executemany:
+            # MySQLdb rewrites INSERT ... VALUES into one multi-row statement
+            self.conn.round_trip(sql)
+        else:
+            for _ in rows:
+                self.conn.round_trip(sql)
+        self.description = None
+        self.rowcount = len(rows)
+        return self.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    """Stand-in for a MySQLdb connection. Every round trip (execute, commit, rollback,
+       ping) is counted and sleeps `rtt` seconds. executemany costs one round trip, like
+       MySQLdb's multi-row INSERT, unless batch_executemany is False (one per row)."""
+
+    _ids = iter(range(1, 1 << 62))
+    _ids_lock = threading.Lock()
+
+    def __init__(self, rtt=0.0, responder=default_responder, batch_executemany=True):
+        self.rtt = rtt
+        self.responder = responder
+        self.batch_executemany = batch_executemany
+        self.round_trips = 0
+        self.statements = []
+
+    def round_trip(self, sql=None):
+        self.round_trips += 1
+        if sql is not None:
+            self.statements.append(sql)
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def next_id(self):
+        with self._ids_lock:
+            return next(self._ids)
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def commit(self):
+        self.round_trip()
+
+    def rollback(self):
+        self.round_trip()
+
+    def ping(self):
+        self.round_trip()
+
+    def close(self):
+        pass
+
+
+class StandInPool(mainapp.ConnectionPool):
+    """The application's ConnectionPool, opening stand-in connections that take
+       `connect_cost` seconds to establish (TCP + TLS + MySQL auth)."""
+
+    def __init__(self, connect_cost=0.0, connection_kwargs=None, **pool_kwargs):
+        super().__init__({}, **pool_kwargs)
+        self.connect_cost = connect_cost
+        self.connection_kwargs = connection_kwargs or {}
+
+    def _connect(self):
+        if self.connect_cost:
+            time.sleep(self.connect_cost)
+        conn = StandInConnection(**self.connection_kwargs)
+        with self._lock:
+            self._born[id(conn)] = time.monotonic()
+            self.stats['created'] += 1
+        return conn
+
+
+class ConnectPerRequest(StandInPool):
+    """What flask_mysqldb.MySQL did: a new connection for every request context,
+       closed on teardown."""
+
+    def release(self, conn):
+        try:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def _checkout(self):
+        return self._connect()
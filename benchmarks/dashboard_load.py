@@ -0,0 +1,131 @@
+"""p50 / p99 latency under a synthetic dashboard load: connection per request vs the pool.
+
+    python benchmarks/dashboard_load.py [--clients 32] [--duration 15] [--warmup 2] [--rtt-ms 20]
+                                        [--connect-ms 120] [--pool-size MYSQL_POOL_SIZE]
+
+Every client is a dashboard screen. It polls /chef/orders?status=all (sending back its
+last ETag) and /owner/dashboard_snapshot through the real views, then waits
+--interval. A writer thread stands in for new orders: every --write-interval it bumps
+the orders version and invalidates the 'orders' cache tag, so the views keep
+reaching the database. Latencies are recorded after --warmup seconds, so the pool's
+initial connects do not count.
+
+The database is a stand-in that sleeps --rtt-ms per round trip. A new connection
+costs --connect-ms (TCP + TLS + MySQL auth to the remote host). "per-request" opens and
+closes a connection in every request context, as flask_mysqldb.MySQL did. "pool" is
+the application's ConnectionPool, sized like the app: MYSQL_POOL_SIZE, which defaults
+to WEB_THREADS (32, the gunicorn --threads). Everything else (coalescing, ETags, response
+cache) is the same in both runs.
+
+Result (stand-in, 32 clients, 15 s after a 2 s warm-up, 20 ms round trip, 120 ms
+connect, pool of 32):
+
+    mode          endpoint                    requests    p50 ms    p99 ms   connections
+    per-request   /chef/orders                     544     189.8     220.6           657
+    per-request   /owner/dashboard_snapshot        553     217.7     247.3           657
+    pool          /chef/orders                     736      80.4     108.6            32
+    pool          /owner/dashboard_snapshot        768      93.0     126.5            32
+
+With --pool-size 10 (the old default) the /chef/orders p99 was 233.3 ms: 32 screens
+polling at once queue for 10 connections. The snapshot p50 depends on how often polls
+land on a fresh cache entry (0.8 ms with the pool of 10).
+"""
+import argparse
+import collections
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+from common import ConnectPerRequest, StandInPool, mainapp, percentile, select_columns, default_responder
+
+ORDERS = [{"id": n, "customer_name": f"Guest {n}", "customer_email": None, "subtotal": 300,
+           "discount_amount": 0, "final_total": 300, "payment_status": "paid", "current_status": "placed",
+           "table_no": n % 20, "created_at": datetime(2025, 1, 1, 12) + timedelta(minutes=n),
+           "updated_at": datetime(2025, 1, 1, 12) + timedelta(minutes=n)} for n in range(1, 51)]
+ITEMS = [{"id": n, "order_id": 1 + n // 3, "item_name": f"Dish {n % 7}", "qty": 1, "unit_price": 100,
+          "total_price": 100} for n in range(150)]
+
+orders_version = itertools.count(1)
+current_version = [0]
+
+
+def responder(sql, params):
+    columns = select_columns(sql)
+    if 'FROM resource_versions' in sql:
+        return columns, [(r, current_version[0]) for r in params]
+    if 'FROM order_items' in sql:
+        return columns, [tuple(i[c] for c in columns) for i in ITEMS if i['order_id'] in params]
+    if 'FROM orders ' in sql and 'COUNT' not in sql:
+        return columns, [tuple(o[c] for c in columns) for o in ORDERS]
+    return default_responder(sql, params)
+
+
+def client_loop(stop, interval, record_from, latencies):
+    client = mainapp.app.test_client()
+    etag = None
+    while not stop.is_set():
+        for path in ('/chef/orders?status=all', '/owner/dashboard_snapshot'):
+            headers = {'If-None-Match': etag} if etag and path.startswith('/chef') else {}
+            started = time.perf_counter()
+            resp = client.get(path, headers=headers)
+            if started >= record_from:
+                latencies[path.split('?')[0]].append(time.perf_counter() - started)
+            assert resp.status_code in (200, 304), resp.get_data()
+            if path.startswith('/chef'):
+                etag = resp.headers.get('ETag', etag)
+        stop.wait(interval)
+
+
+def writer_loop(stop, interval):
+    while not stop.wait(interval):
+        current_version[0] = next(orders_version)
+        mainapp.response_cache.invalidate('orders')
+
+
+def run(mode, args):
+    kwargs = dict(connect_cost=args.connect_ms / 1000,
+                  connection_kwargs=dict(rtt=args.rtt_ms / 1000, responder=responder))
+    if mode == 'per-request':
+        pool = ConnectPerRequest(max_size=10_000, **kwargs)
+    else:
+        pool = StandInPool(max_size=args.pool_size, **kwargs)
+    mainapp.mysql.pool = pool
+
+    latencies = collections.defaultdict(list)
+    stop = threading.Event()
+    record_from = time.perf_counter() + args.warmup
+    threads = [threading.Thread(target=client_loop, args=(stop, args.interval, record_from, latencies))
+               for _ in range(args.clients)]
+    threads.append(threading.Thread(target=writer_loop, args=(stop, args.write_interval)))
+    for t in threads:
+        t.start()
+    time.sleep(args.warmup + args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, pool.stats.get('created', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--warmup', type=float, default=2.0, help="seconds run before latencies are recorded")
+    parser.add_argument('--interval', type=float, default=0.5, help="seconds between a client's polls")
+    parser.add_argument('--write-interval', type=float, default=1.0)
+    parser.add_argument('--rtt-ms', type=float, default=20.0)
+    parser.add_argument('--connect-ms', type=float, default=120.0)
+    parser.add_argument('--pool-size', type=int, default=mainapp.app.config['MYSQL_POOL_SIZE'])
+    args = parser.parse_args()
+
+    print(f"    {'mode':<14}{'endpoint':<28}{'requests':>8}{'p50 ms':>10}{'p99 ms':>10}{'connections':>14}")
+    for mode in ('per-request', 'pool'):
+        latencies, created = run(mode, args)
+        for endpoint, samples in sorted(latencies.items()):
+            print(f"    {mode:<14}{endpoint:<28}{len(samples):>8}"
+                  f"{percentile(samples, 50) * 1000:>10.1f}{percentile(samples, 99) * 1000:>10.1f}{created:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Concurrency stress test for use_ingredient / restock_ingredient against a local MySQL.
+
+    BENCH_MYSQL_HOST=127.0.0.1 BENCH_MYSQL_DB=restaurant_bench \\
+        python benchmarks/stress_stock.py [--threads 32] [--ops 200] [--start-stock 50]
+
+Creates a throwaway ingredient. Many threads then send random /use and /restock
+requests for it through the real views and pool. Usage is weighted so the stock
+often runs out and deductions get refused. Meanwhile a monitor thread keeps reading
+current_stock. At the end it checks that:
+
+  * the final stock equals start + accepted restocks - accepted deductions;
+  * the ledger (inventory_transactions) holds exactly those quantities;
+  * stock never went below zero, in any response or any monitor read;
+  * every refusal was an "Insufficient stock" 400.
+
+The ingredient and its transactions are deleted afterwards (--keep to inspect them).
+Exits 1 if any check fails. The database must already exist; importing mainapp
+creates the tables and runs the migrations. tests/test_stock_concurrency.py runs the
+same checks without a server, against SQLite.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from decimal import Decimal
+
+from common import mainapp
+
+USE_QUANTITIES = ['0.005', '0.25', '1', '2.5']
+RESTOCK_QUANTITIES = ['1', '2', '4.125']
+
+
+def query(sql, params=()):
+    with mainapp.app.app_context():
+        cursor = mainapp.mysql.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            mainapp.mysql.connection.commit()
+            return rows, cursor.lastrowid
+        finally:
+            cursor.close()
+
+
+def worker(ingredient_id, ops, seed, totals, problems, lock):
+    rng = random.Random(seed)
+    client = mainapp.app.test_client()
+    used, restocked = Decimal(0), Decimal(0)
+    for _ in range(ops):
+        if rng.random() < 0.7:
+            qty = rng.choice(USE_QUANTITIES)
+            resp = client.post(f'/api/ingredients/{ingredient_id}/use', json={"quantity": float(qty)})
+            body = resp.get_json()
+            if resp.status_code == 200:
+                used += Decimal(qty)
+            elif resp.status_code != 400 or body.get('message') != 'Insufficient stock':
+                problems.append(f"use {qty}: {resp.status_code} {body}")
+        else:
+            qty = rng.choice(RESTOCK_QUANTITIES)
+            resp = client.post(f'/api/ingredients/{ingredient_id}/restock', json={"quantity": float(qty)})
+            body = resp.get_json()
+            if resp.status_code == 200:
+                restocked += Decimal(qty)
+            else:
+                problems.append(f"restock {qty}: {resp.status_code} {body}")
+        stock = body.get('new_stock', body.get('current_stock')) if body else None
+        if stock is not None and stock < 0:
+            problems.append(f"negative stock in a response: {stock}")
+    with lock:
+        totals['used'] += used
+        totals['restocked'] += restocked
+
+
+def monitor(ingredient_id, stop, readings):
+    while not stop.is_set():
+        rows, _ = query("SELECT current_stock FROM ingredients WHERE id = %s", (ingredient_id,))
+        readings.append(rows[0][0])
+        time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--ops', type=int, default=200, help="requests per thread")
+    parser.add_argument('--start-stock', type=Decimal, default=Decimal('50'))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    _, ingredient_id = query(
+        "INSERT INTO ingredients (name, current_stock, unit, reorder_level, initial_stock) VALUES (%s, %s, 'kg', 0, %s)",
+        (f"stress-test {time.time():.0f}", args.start_stock, args.start_stock)
+    )
+    totals = {'used': Decimal(0), 'restocked': Decimal(0)}
+    problems, readings, lock, stop = [], [], threading.Lock(), threading.Event()
+    watcher = threading.Thread(target=monitor, args=(ingredient_id, stop, readings))
+    workers = [threading.Thread(target=worker, args=(ingredient_id, args.ops, args.seed + n, totals, problems, lock))
+               for n in range(args.threads)]
+    started = time.perf_counter()
+    try:
+        watcher.start()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        watcher.join()
+
+        rows, _ = query("SELECT current_stock FROM ingredients WHERE id = %s", (ingredient_id,))
+        final = rows[0][0]
+        rows, _ = query(
+            f"SELECT COALESCE(SUM({mainapp.LEDGER_SIGNED_QTY}), 0) FROM inventory_transactions t WHERE t.ingredient_id = %s",
+            (ingredient_id,)
+        )
+        ledger = rows[0][0]
+    finally:
+        stop.set()
+        if watcher.is_alive():
+            watcher.join()
+        if not args.keep:
+            query("DELETE FROM inventory_transactions WHERE ingredient_id = %s", (ingredient_id,))
+            query("DELETE FROM ingredients WHERE id = %s", (ingredient_id,))
+
+    expected = args.start_stock + totals['restocked'] - totals['used']
+    if final != expected:
+        problems.append(f"final stock {final} != start + restocks - deductions = {expected}")
+    if ledger != totals['restocked'] - totals['used']:
+        problems.append(f"ledger {ledger} != restocks - deductions = {totals['restocked'] - totals['used']}")
+    if readings and min(readings) < 0:
+        problems.append(f"stock went negative: {min(readings)}")
+
+    print(f"{args.threads * args.ops} requests from {args.threads} threads in {elapsed:.1f}s; "
+          f"deducted {totals['used']}, restocked {totals['restocked']}, final stock {final}, "
+          f"lowest of {len(readings)} reads {min(readings) if readings else '-'}")
+    for problem in problems[:20]:
+        print("FAIL:", problem)
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# date_ranges.py
+# Half-open date ranges for report filters. Reports filter on col >= start AND col < end
+# instead of wrapping the column in DATE()/YEAR(), so MySQL can use an index range scan.
+from datetime import datetime, timedelta
+
+def day_range(start, end=None):
+    """[start 00:00, day after end 00:00) for the inclusive dates start..end."""
+    end = end or start
+    return (datetime(start.year, start.month, start.day),
+            datetime(end.year, end.month, end.day) + timedelta(days=1))
+
+def month_range(start, end=None):
+    """[1st of start's month, 1st of the month after end's month) for inclusive months."""
+    end = end or start
+    end_year, end_month = (end.year + 1, 1) if end.month == 12 else (end.year, end.month + 1)
+    return datetime(start.year, start.month, 1), datetime(end_year, end_month, 1)
+
+def parse_date_arg(value, fmt='%Y-%m-%d'):
+    """Parse a date query argument; None when empty, ValueError when malformed."""
+    return datetime.strptime(value, fmt).date() if value else None
@@ -1,15 +1,28 @@
 # mainapp.py
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-from flask_mysqldb import MySQL
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, g
 import MySQLdb.cursors
 import re
 from werkzeug.security import generate_password_hash
 from functools import wraps
 from datetime import datetime, timedelta
 import json
+import bisect
+import collections
+import hashlib
 import logging
 import traceback
 import os
+import queue
+import threading
+import time
+import numpy as np
+
+from date_ranges import day_range, month_range, parse_date_arg
+
+try:
+    import redis  # optional: cross-process fan-out of order events
+except ImportError:
+    redis = None
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -22,8 +35,194 @@ app.config['MYSQL_USER'] = os.getenv('MYSQL_USER', 'root')
 app.config['MYSQL_PASSWORD'] = os.getenv('MYSQL_PASSWORD', 'ydQXLgRRESemchLhQbKDoHVGBWXsbGyY')
 app.config['MYSQL_DB'] = os.getenv('MYSQL_DB', 'railway')
 app.config['MYSQL_PORT'] = int(os.getenv('MYSQL_PORT', 33448))
+# One pooled connection per gunicorn thread (Procfile: --threads ${WEB_THREADS:-32}), so a
+# worker busy on every thread never waits for a connection
+app.config['WEB_THREADS'] = int(os.getenv('WEB_THREADS', 32))
+app.config['MYSQL_POOL_SIZE'] = int(os.getenv('MYSQL_POOL_SIZE', app.config['WEB_THREADS']))
+app.config['MYSQL_POOL_MAX_LIFETIME'] = int(os.getenv('MYSQL_POOL_MAX_LIFETIME', 1800))  # seconds
+app.config['MYSQL_POOL_WAIT_TIMEOUT'] = float(os.getenv('MYSQL_POOL_WAIT_TIMEOUT', 10))  # seconds
+
+# ---------------------------------
+# MySQL connection pool
+# ---------------------------------
+class PoolTimeout(Exception):
+    """No pooled connection became free within the wait timeout."""
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQLdb connections.
+
+       At most max_size connections are checked out at once; acquire() waits up to
+       wait_timeout seconds for one and raises PoolTimeout otherwise. Idle connections
+       are pinged before reuse if they sat longer than ping_after seconds, and are closed
+       once older than max_lifetime."""
+
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, connect_kwargs, max_size=10, max_lifetime=1800, wait_timeout=10.0, ping_after=30.0):
+        self.connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.wait_timeout = wait_timeout
+        self.ping_after = ping_after
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = collections.deque()  # (conn, last_used), most recently used on the right
+        self._born = {}                   # id(conn) -> creation time
+        self._pid = os.getpid()
+        self._waits = collections.deque(maxlen=self.WAIT_SAMPLES)
+        self.stats = collections.Counter()
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise PoolTimeout(f"no database connection available after {self.wait_timeout}s")
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._waits.append(time.monotonic() - started)
+            self.stats['acquired'] += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection; any open transaction is rolled back first so the next
+           borrower starts clean (and does not read from a stale snapshot)."""
+        try:
+            try:
+                conn.rollback()
+                healthy = not self._expired(conn)
+            except MySQLdb.Error:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def _checkout(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked after connections were opened: never share sockets with the parent
+                self._idle.clear()
+                self._born.clear()
+                self._pid = os.getpid()
+        while True:
+            with self._lock:
+                conn, last_used = self._idle.pop() if self._idle else (None, None)
+            if conn is None:
+                return self._connect()
+            if self._expired(conn):
+                self._discard(conn)
+                continue
+            if time.monotonic() - last_used > self.ping_after:
+                try:
+                    conn.ping()
+                except MySQLdb.Error:
+                    with self._lock:
+                        self.stats['failed_pings'] += 1
+                    self._discard(conn)
+                    continue
+            return conn
+
+    def _connect(self):
+        conn = MySQLdb.connect(**self.connect_kwargs)
+        with self._lock:
+            self._born[id(conn)] = time.monotonic()
+            self.stats['created'] += 1
+        return conn
+
+    def _expired(self, conn):
+        born = self._born.get(id(conn))
+        return born is None or time.monotonic() - born > self.max_lifetime
+
+    def _discard(self, conn):
+        with self._lock:
+            self._born.pop(id(conn), None)
+            self.stats['closed'] += 1
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+    def metrics(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            idle = len(self._idle)
+            open_conns = len(self._born)
+            stats = dict(self.stats)
+
+        def pct(p):
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 2)
+
+        return {
+            "max_size": self.max_size,
+            "open": open_conns,
+            "idle": idle,
+            "in_use": open_conns - idle,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p99": pct(0.99),
+            "wait_ms_max": round(waits[-1] * 1000, 2) if waits else None,
+            "waits_over_100ms": len(waits) - bisect.bisect_right(waits, 0.1),
+            "samples": len(waits),
+            "acquired": stats.get('acquired', 0),
+            "timeouts": stats.get('timeouts', 0),
+            "created": stats.get('created', 0),
+            "closed": stats.get('closed', 0),
+            "failed_pings": stats.get('failed_pings', 0)
+        }
+
+class PooledMySQL:
+    """Replacement for flask_mysqldb.MySQL: mysql.connection borrows one pooled
+       connection per app context and hands it back on teardown."""
+
+    def __init__(self, app=None):
+        self.pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.pool = ConnectionPool(
+            dict(host=app.config['MYSQL_HOST'], user=app.config['MYSQL_USER'],
+                 passwd=app.config['MYSQL_PASSWORD'], db=app.config['MYSQL_DB'],
+                 port=app.config['MYSQL_PORT'], charset='utf8', connect_timeout=10),
+            max_size=app.config['MYSQL_POOL_SIZE'],
+            max_lifetime=app.config['MYSQL_POOL_MAX_LIFETIME'],
+            wait_timeout=app.config['MYSQL_POOL_WAIT_TIMEOUT']
+        )
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def connection(self):
+        conn = g.get('_mysql_conn')
+        if conn is None:
+            conn = g._mysql_conn = self.pool.acquire()
+        return conn
 
-mysql = MySQL(app)
+    def teardown(self, exception):
+        conn = g.pop('_mysql_conn', None)
+        if conn is not None:
+            self.pool.release(conn)
+
+mysql = PooledMySQL(app)
+
+@app.errorhandler(PoolTimeout)
+def pool_timeout(e):
+    app.logger.warning("database pool exhausted: %s", e)
+    return jsonify({"success": False, "message": "Server busy, please retry"}), 503
+
+# Optional Redis (e.g. a local redis-server) shared by all gunicorn workers
+app.config['REDIS_URL'] = os.getenv('REDIS_URL')
+
+# Closed orders / inventory transactions older than this many months move to archive tables
+app.config['ARCHIVE_AFTER_MONTHS'] = max(2, int(os.getenv('ARCHIVE_AFTER_MONTHS', 6)))
 
 # basic logger
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +238,158 @@ def dict_from_row(cursor, row):
     cols = [c[0] for c in cursor.description]
     return dict(zip(cols, row))
 
+# -----------------------
+# Order hydration (orders + their line items)
+# -----------------------
+ORDER_LIST_COLUMNS = ("id, customer_name, customer_email, subtotal, discount_amount, final_total, "
+                      "payment_status, current_status, table_no, created_at, updated_at")
+
+def order_tables(include_archive):
+    """(orders, order_items) to read from: the live tables, or the live + archive views."""
+    return ("orders_all", "order_items_all") if include_archive else ("orders", "order_items")
+
+def attach_order_items(cursor, orders, items_table="order_items"):
+    """Attach an 'items' list to every order dict using a single IN (...) query.
+       Orders without items get an empty list."""
+    if not orders:
+        return orders
+    by_id = {}
+    for o in orders:
+        o['items'] = []
+        by_id[o['id']] = o
+    placeholders = ", ".join(["%s"] * len(by_id))
+    cursor.execute(
+        f"SELECT id, order_id, item_name, qty, unit_price, total_price FROM {items_table} "
+        f"WHERE order_id IN ({placeholders}) ORDER BY order_id, id",
+        tuple(by_id)
+    )
+    for row in cursor.fetchall():
+        item = dict_from_row(cursor, row)
+        by_id[item.pop('order_id')]['items'].append(item)
+    return orders
+
+def fetch_orders_with_items(cursor, where=None, params=(), order_by="created_at ASC", limit=None,
+                            include_archive=False):
+    """Load orders matching an optional WHERE clause together with their items.
+       Always costs two queries, whatever the number of orders. include_archive reads
+       the live + archive views (for date ranges older than archive_horizon())."""
+    orders_table, items_table = order_tables(include_archive)
+    sql = f"SELECT {ORDER_LIST_COLUMNS} FROM {orders_table}"
+    if where:
+        sql += " WHERE " + where
+    sql += " ORDER BY " + order_by
+    params = tuple(params)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params += (int(limit),)
+    cursor.execute(sql, params)
+    orders = [dict_from_row(cursor, r) for r in cursor.fetchall()]
+    return attach_order_items(cursor, orders, items_table)
+
+# -----------------------
+# Sales rollups
+# -----------------------
+# sales_daily_rollup, sales_hourly_rollup and item_daily_rollup hold per-day / per-hour
+# totals so reports cost O(days) instead of O(orders). They count every order, whatever
+# its status (like the reports always have); cancelled orders are also tracked separately.
+# Writers call these helpers inside their own transaction, before commit.
+
+def rollup_add_order(cursor, order_id):
+    """Add a freshly inserted order (and its items) to the rollups."""
+    cursor.execute("""
+        INSERT INTO sales_daily_rollup (day, orders_count, gross, discounts, net)
+        SELECT * FROM (
+            SELECT DATE(created_at) AS d, 1 AS c, subtotal AS g, discount_amount AS dc, final_total AS n
+              FROM orders WHERE id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE orders_count = orders_count + src.c, gross = gross + src.g,
+                                discounts = discounts + src.dc, net = net + src.n
+    """, (order_id,))
+    cursor.execute("""
+        INSERT INTO sales_hourly_rollup (hour_start, orders_count, net)
+        SELECT * FROM (
+            SELECT TIMESTAMP(DATE(created_at), MAKETIME(HOUR(created_at), 0, 0)) AS h, 1 AS c, final_total AS n
+              FROM orders WHERE id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE orders_count = orders_count + src.c, net = net + src.n
+    """, (order_id,))
+    cursor.execute("""
+        INSERT INTO item_daily_rollup (day, item_name, qty, revenue, order_count)
+        SELECT * FROM (
+            SELECT DATE(o.created_at) AS d, oi.item_name AS name, SUM(oi.qty) AS q, SUM(oi.total_price) AS r, 1 AS c
+              FROM order_items oi JOIN orders o ON o.id = oi.order_id
+             WHERE o.id = %s
+             GROUP BY DATE(o.created_at), oi.item_name
+        ) AS src
+        ON DUPLICATE KEY UPDATE qty = qty + src.q, revenue = revenue + src.r, order_count = order_count + src.c
+    """, (order_id,))
+
+def rollup_status_change(cursor, order_id, old_status, new_status):
+    """Keep the cancelled counters in step when an order enters or leaves 'cancelled'."""
+    if (old_status == 'cancelled') == (new_status == 'cancelled'):
+        return
+    sign = 1 if new_status == 'cancelled' else -1
+    cursor.execute("""
+        UPDATE sales_daily_rollup r JOIN orders o ON r.day = DATE(o.created_at)
+           SET r.cancelled_count = r.cancelled_count + %s,
+               r.cancelled_net = r.cancelled_net + %s * o.final_total
+         WHERE o.id = %s
+    """, (sign, sign, order_id))
+
+def rebuild_rollups(cursor):
+    """Recompute every rollup from live and archived orders (backfill or repair)."""
+    cursor.execute("DELETE FROM sales_daily_rollup")
+    cursor.execute("""
+        INSERT INTO sales_daily_rollup (day, orders_count, gross, discounts, net, cancelled_count, cancelled_net)
+        SELECT DATE(created_at), COUNT(*), COALESCE(SUM(subtotal),0), COALESCE(SUM(discount_amount),0),
+               COALESCE(SUM(final_total),0), SUM(current_status = 'cancelled'),
+               COALESCE(SUM(CASE WHEN current_status = 'cancelled' THEN final_total ELSE 0 END),0)
+          FROM orders_all GROUP BY DATE(created_at)
+    """)
+    cursor.execute("DELETE FROM sales_hourly_rollup")
+    cursor.execute("""
+        INSERT INTO sales_hourly_rollup (hour_start, orders_count, net)
+        SELECT TIMESTAMP(DATE(created_at), MAKETIME(HOUR(created_at), 0, 0)) AS h, COUNT(*), COALESCE(SUM(final_total),0)
+          FROM orders_all GROUP BY h
+    """)
+    cursor.execute("DELETE FROM item_daily_rollup")
+    cursor.execute("""
+        INSERT INTO item_daily_rollup (day, item_name, qty, revenue, order_count)
+        SELECT DATE(o.created_at) AS d, oi.item_name, SUM(oi.qty), SUM(oi.total_price), COUNT(DISTINCT oi.order_id)
+          FROM order_items_all oi JOIN orders_all o ON o.id = oi.order_id
+         GROUP BY d, oi.item_name
+    """)
+
+def backfill_rollups_if_empty():
+    """First start after the rollup tables were introduced: build them from existing orders."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM sales_daily_rollup), EXISTS(SELECT 1 FROM orders)")
+        has_rollups, has_orders = cursor.fetchone()
+        if has_orders and not has_rollups:
+            rebuild_rollups(cursor)
+            mysql.connection.commit()
+            print("Sales rollups backfilled")
+    except Exception as e:
+        mysql.connection.rollback()
+        print(f"Error backfilling sales rollups: {e}")
+    finally:
+        cursor.close()
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Backfill / rebuild the sales rollup tables: flask --app mainapp rebuild-rollups"""
+    cursor = mysql.connection.cursor()
+    try:
+        rebuild_rollups(cursor)
+        mysql.connection.commit()
+        print("Sales rollups rebuilt")
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
 # ---------------------------------
 # Database Initialization
 # ---------------------------------
@@ -182,6 +533,39 @@ def init_database():
             )
         """)
         
+        # Sales rollups, maintained on write (see "Sales rollups" below)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+                day DATE PRIMARY KEY,
+                orders_count INT NOT NULL DEFAULT 0,
+                gross DECIMAL(14,2) NOT NULL DEFAULT 0,
+                discounts DECIMAL(14,2) NOT NULL DEFAULT 0,
+                net DECIMAL(14,2) NOT NULL DEFAULT 0,
+                cancelled_count INT NOT NULL DEFAULT 0,
+                cancelled_net DECIMAL(14,2) NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sales_hourly_rollup (
+                hour_start DATETIME PRIMARY KEY,
+                orders_count INT NOT NULL DEFAULT 0,
+                net DECIMAL(14,2) NOT NULL DEFAULT 0
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS item_daily_rollup (
+                day DATE NOT NULL,
+                item_name VARCHAR(255) NOT NULL,
+                qty INT NOT NULL DEFAULT 0,
+                revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+                order_count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, item_name)
+            )
+        """)
+        
         mysql.connection.commit()
         print("Database tables initialized successfully")
         
@@ -209,12 +593,201 @@ def create_default_owner():
     finally:
         cursor.close()
 
+# ---------------------------------
+# Schema migrations
+# ---------------------------------
+# Ordered SQL files in migrations/ named <version>_<description>.sql. Applied versions are
+# recorded in schema_version; a MySQL named lock keeps several workers from racing.
+# DDL commits implicitly in MySQL, so a migration that fails halfway is simply re-run:
+# "already exists" errors are skipped.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+ALREADY_EXISTS_ERRORS = {1050, 1060, 1061, 1826}  # table, column, index, foreign key
+
+def split_sql_statements(text):
+    """Split a migration file into statements ('--' comment lines removed, ';' terminated)."""
+    lines = [l for l in text.splitlines() if not l.strip().startswith('--')]
+    return [s.strip() for s in "\n".join(lines).split(';') if s.strip()]
+
+def pending_migrations(applied):
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match and int(match.group(1)) not in applied:
+            migrations.append((int(match.group(1)), filename))
+    return sorted(migrations)
+
+def run_migrations():
+    """Apply every migration newer than the recorded schema version."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("SELECT GET_LOCK('schema_migrations', 60)")
+        if not cursor.fetchone()[0]:
+            raise RuntimeError("Could not acquire the schema migration lock")
+        try:
+            cursor.execute("SELECT version FROM schema_version")
+            applied = {row[0] for row in cursor.fetchall()}
+            for version, filename in pending_migrations(applied):
+                with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+                    statements = split_sql_statements(f.read())
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except MySQLdb.Error as e:
+                        if e.args[0] not in ALREADY_EXISTS_ERRORS:
+                            raise
+                        app.logger.info("migration %s: skipping (%s)", filename, e.args[1])
+                cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, filename))
+                mysql.connection.commit()
+                print(f"Applied migration {filename}")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+            cursor.fetchall()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations: flask --app mainapp migrate"""
+    run_migrations()
+
+# Representative hot queries checked by `flask --app mainapp explain-queries`
+INDEXED_QUERIES = [
+    ("kitchen queue", f"SELECT {ORDER_LIST_COLUMNS} FROM orders WHERE current_status = %s ORDER BY created_at ASC, id ASC LIMIT 201", ('placed',)),
+    ("orders page", f"SELECT {ORDER_LIST_COLUMNS} FROM orders WHERE created_at >= %s AND created_at < %s ORDER BY created_at ASC, id ASC LIMIT 201", ('2025-01-01', '2025-01-02')),
+    ("order changes", f"SELECT {ORDER_LIST_COLUMNS} FROM orders WHERE updated_at >= %s ORDER BY updated_at ASC, id ASC LIMIT 501", ('2025-01-01',)),
+    ("order items", "SELECT id, order_id, item_name, qty, unit_price, total_price FROM order_items WHERE order_id IN (%s, %s) ORDER BY order_id, id", (1, 2)),
+    ("orders report", "SELECT id, final_total FROM orders WHERE created_at >= %s AND created_at < %s ORDER BY created_at DESC", ('2025-01-01', '2025-01-08')),
+    ("low stock", "SELECT id, current_stock, reorder_level FROM ingredients WHERE current_stock <= reorder_level", ()),
+    ("ingredient history", "SELECT id, quantity FROM inventory_transactions WHERE ingredient_id = %s ORDER BY created_at", (1,)),
+    ("usage window", "SELECT ingredient_id, SUM(quantity) FROM inventory_transactions WHERE transaction_type = 'usage' AND created_at >= %s GROUP BY ingredient_id", ('2025-01-01',)),
+    ("pending POs", "SELECT COUNT(*) FROM purchase_orders WHERE status = 'pending'", ()),
+    ("PO lines", "SELECT ingredient_id, quantity FROM purchase_order_items WHERE po_id = %s", (1,)),
+    ("expenses range", "SELECT id, amount FROM expenses WHERE expense_date BETWEEN %s AND %s", ('2025-01-01', '2025-01-31')),
+]
+
+@app.cli.command('explain-queries')
+def explain_queries_command():
+    """EXPLAIN each hot query and flag the ones that do not use an index."""
+    cursor = mysql.connection.cursor()
+    unindexed = 0
+    try:
+        for name, sql, params in INDEXED_QUERIES:
+            cursor.execute("EXPLAIN " + sql, params)
+            for row in [dict_from_row(cursor, r) for r in cursor.fetchall()]:
+                full_scan = row.get('type') == 'ALL' or not row.get('key')
+                unindexed += full_scan
+                print(f"{'FULL SCAN' if full_scan else 'ok':9}  {name:20} table={row.get('table')} "
+                      f"type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+    finally:
+        cursor.close()
+    if unindexed:
+        # on near-empty tables MySQL may prefer a scan even when an index exists
+        raise SystemExit(f"{unindexed} access path(s) without an index")
+
+# ---------------------------------
+# Archival
+# ---------------------------------
+# Closed orders (delivered / cancelled) and inventory transactions created before
+# archive_horizon() are moved to *_archive tables in batches, so the live tables that
+# the dashboards poll stay small. Reports over older ranges read the *_all views
+# (migration 0007); the sales rollups are unaffected since they are never archived.
+ARCHIVE_BATCH_SIZE = 1000
+CLOSED_ORDER_STATUSES = ('delivered', 'cancelled')
+
+def archive_horizon():
+    """Midnight on the 1st of the month ARCHIVE_AFTER_MONTHS months back."""
+    today = datetime.now()
+    months = today.year * 12 + today.month - 1 - app.config['ARCHIVE_AFTER_MONTHS']
+    return datetime(months // 12, months % 12 + 1, 1)
+
+def reaches_archive(since):
+    """True if a range starting at `since` (None = unbounded) may include archived rows."""
+    return since is None or since < archive_horizon()
+
+def archive_order_batch(cursor, cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move up to batch_size closed orders created before cutoff (and their items) to the
+       archive tables. Returns the number of orders moved; the caller commits."""
+    cursor.execute(
+        "SELECT id FROM orders WHERE created_at < %s AND current_status IN (%s, %s) ORDER BY id LIMIT %s FOR UPDATE",
+        (cutoff,) + CLOSED_ORDER_STATUSES + (batch_size,)
+    )
+    ids = [r[0] for r in cursor.fetchall()]
+    if not ids:
+        return 0
+    placeholders = ",".join(["%s"] * len(ids))
+    cursor.execute(f"INSERT INTO order_items_archive SELECT * FROM order_items WHERE order_id IN ({placeholders})", ids)
+    cursor.execute(f"INSERT INTO orders_archive SELECT * FROM orders WHERE id IN ({placeholders})", ids)
+    cursor.execute(f"DELETE FROM order_items WHERE order_id IN ({placeholders})", ids)
+    cursor.execute(f"DELETE FROM orders WHERE id IN ({placeholders})", ids)
+    bump_resource_versions(cursor, 'orders')
+    return len(ids)
+
+def archive_transaction_batch(cursor, cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move up to batch_size inventory transactions created before cutoff to the archive.
+       Only safe once a snapshot at or after cutoff exists (archive_old_data takes one)."""
+    cursor.execute(
+        "SELECT id FROM inventory_transactions WHERE created_at < %s ORDER BY id LIMIT %s FOR UPDATE",
+        (cutoff, batch_size)
+    )
+    ids = [r[0] for r in cursor.fetchall()]
+    if not ids:
+        return 0
+    placeholders = ",".join(["%s"] * len(ids))
+    cursor.execute(f"INSERT INTO inventory_transactions_archive SELECT * FROM inventory_transactions WHERE id IN ({placeholders})", ids)
+    cursor.execute(f"DELETE FROM inventory_transactions WHERE id IN ({placeholders})", ids)
+    return len(ids)
+
+def archive_old_data(batch_size=ARCHIVE_BATCH_SIZE):
+    """Archive everything older than archive_horizon(), one committed batch at a time.
+       Returns (orders_moved, transactions_moved)."""
+    cutoff = archive_horizon()
+    cursor = mysql.connection.cursor()
+    try:
+        # the ledger must stay reconstructible from the live table after the cutoff
+        take_inventory_snapshot(cursor, cutoff)
+        mysql.connection.commit()
+
+        moved = [0, 0]
+        for i, archive_batch in enumerate((archive_order_batch, archive_transaction_batch)):
+            while True:
+                n = archive_batch(cursor, cutoff, batch_size)
+                mysql.connection.commit()
+                moved[i] += n
+                if n < batch_size:
+                    break
+        return tuple(moved)
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+@app.cli.command('archive')
+def archive_command():
+    """Move closed orders / old inventory transactions to the archive tables: flask --app mainapp archive"""
+    orders_moved, transactions_moved = archive_old_data()
+    print(f"Archived {orders_moved} order(s) and {transactions_moved} inventory transaction(s) "
+          f"created before {archive_horizon():%Y-%m-%d}")
+
 # Initialize database when app starts
 def initialize_app():
     with app.app_context():
         try:
             init_database()
+            run_migrations()
             create_default_owner()
+            backfill_rollups_if_empty()
             print("Database initialization completed successfully")
         except Exception as e:
             print(f"Database initialization error: {e}")
@@ -453,6 +1026,334 @@ def reset_password():
 def show_menu():
     return render_template('menu1.html')
 
+# ---------------------------------
+# Menu catalog (menu_items)
+# ---------------------------------
+MENU_CACHE_TTL = 60  # seconds; edits made through this process invalidate immediately
+
+class CachedSnapshot:
+    """A value loaded from the database and kept in-process for ttl seconds, or until
+       invalidate() is called after an edit. Subclasses implement _load()."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self):
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._snapshot = self._load()
+                self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    def _load(self):
+        raise NotImplementedError
+
+class MenuCatalog(CachedSnapshot):
+    """In-process copy of menu_items: the item list served by /api/menu and the
+       name -> price map create_order uses to price carts without extra queries."""
+
+    def prices(self):
+        return self.snapshot()['prices']
+
+    def _load(self):
+        cursor = mysql.connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT id, name, category, price, description, image, updated_at "
+                "FROM menu_items ORDER BY sort_order, id"
+            )
+            rows = [dict_from_row(cursor, r) for r in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+        last_modified = max((r.pop('updated_at') for r in rows), default=None)
+        items = [dict(r, price=float(r['price'])) for r in rows]
+        return {
+            "items": items,
+            "prices": {i['name']: i['price'] for i in items},
+            "etag": hashlib.sha1(json.dumps(items, sort_keys=True).encode()).hexdigest(),
+            "last_modified": last_modified
+        }
+
+menu_catalog = MenuCatalog(MENU_CACHE_TTL)
+
+@app.route('/api/menu', methods=['GET'])
+def get_menu():
+    """Menu items in display order; supports If-None-Match / If-Modified-Since."""
+    try:
+        snap = menu_catalog.snapshot()
+    except Exception as e:
+        app.logger.exception("get_menu error")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    resp = jsonify({"success": True, "items": snap['items']})
+    resp.set_etag(snap['etag'])
+    if snap['last_modified']:
+        resp.last_modified = snap['last_modified']
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
+
+def parse_menu_item(data, partial=False):
+    """Validate a menu item payload; returns (fields, error_message)."""
+    fields = {}
+    for key in ('name', 'category', 'description', 'image'):
+        if key in data:
+            fields[key] = (data.get(key) or '').strip()
+    if 'price' in data:
+        try:
+            fields['price'] = round(float(data['price']), 2)
+        except (TypeError, ValueError):
+            return None, "Price must be a number"
+        if fields['price'] < 0:
+            return None, "Price must not be negative"
+    if not partial and (not fields.get('name') or not fields.get('category') or 'price' not in fields):
+        return None, "Name, price and category are required"
+    if partial and 'name' in fields and not fields['name']:
+        return None, "Name must not be empty"
+    return fields, None
+
+@app.route('/api/menu', methods=['POST'])
+def add_menu_item():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"success": False, "message": "Invalid JSON"}), 400
+    fields, error = parse_menu_item(data)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute(
+            """INSERT INTO menu_items (name, category, price, description, image, sort_order)
+               SELECT %s, %s, %s, %s, %s, COALESCE(MAX(sort_order), 0) + 1 FROM menu_items""",
+            (fields['name'], fields['category'], fields['price'],
+             fields.get('description', ''), fields.get('image') or '/static/images/dessert.jpg')
+        )
+        item_id = cursor.lastrowid
+        mysql.connection.commit()
+        menu_catalog.invalidate()
+        return jsonify({"success": True, "id": item_id, "message": "Menu item added"}), 201
+    except MySQLdb.IntegrityError:
+        mysql.connection.rollback()
+        return jsonify({"success": False, "message": "A menu item with this name already exists"}), 400
+    except Exception as e:
+        mysql.connection.rollback()
+        app.logger.exception("add_menu_item error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/api/menu/<int:item_id>', methods=['PUT'])
+def update_menu_item(item_id):
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"success": False, "message": "Invalid JSON"}), 400
+    fields, error = parse_menu_item(data, partial=True)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        assignments = ", ".join(f"{k} = %s" for k in fields)
+        cursor.execute(f"UPDATE menu_items SET {assignments} WHERE id = %s", list(fields.values()) + [item_id])
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT id FROM menu_items WHERE id = %s", (item_id,))
+            if not cursor.fetchone():
+                return jsonify({"success": False, "message": "Menu item not found"}), 404
+        mysql.connection.commit()
+        menu_catalog.invalidate()
+        recipe_matrix.invalidate()
+        return jsonify({"success": True, "message": "Menu item updated"})
+    except MySQLdb.IntegrityError:
+        mysql.connection.rollback()
+        return jsonify({"success": False, "message": "A menu item with this name already exists"}), 400
+    except Exception as e:
+        mysql.connection.rollback()
+        app.logger.exception("update_menu_item error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/api/menu/<int:item_id>', methods=['DELETE'])
+def delete_menu_item(item_id):
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("DELETE FROM menu_items WHERE id = %s", (item_id,))
+        if cursor.rowcount == 0:
+            return jsonify({"success": False, "message": "Menu item not found"}), 404
+        mysql.connection.commit()
+        menu_catalog.invalidate()
+        recipe_matrix.invalidate()
+        return jsonify({"success": True, "message": "Menu item deleted"})
+    except Exception as e:
+        mysql.connection.rollback()
+        app.logger.exception("delete_menu_item error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+# ---------------------------------
+# Recipes (menu item -> ingredient quantities)
+# ---------------------------------
+STOCK_DECIMALS = 3  # scale of every stock quantity column (migration 0008)
+
+class RecipeMatrix(CachedSnapshot):
+    """In-process copy of recipes keyed by menu item name, so exploding an order
+       into ingredient usage is a dictionary sum rather than a query per line."""
+
+    def _load(self):
+        cursor = mysql.connection.cursor()
+        try:
+            cursor.execute(
+                """SELECT m.name, r.ingredient_id, r.quantity
+                   FROM recipes r JOIN menu_items m ON m.id = r.menu_item_id"""
+            )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        matrix = collections.defaultdict(dict)
+        for item_name, ingredient_id, quantity in rows:
+            matrix[item_name][ingredient_id] = float(quantity)
+        return dict(matrix)
+
+    def explode(self, lines):
+        """Total ingredient usage for [(item_name, qty), ...] as {ingredient_id: quantity}.
+           Items without a recipe contribute nothing."""
+        matrix = self.snapshot()
+        usage = collections.Counter()
+        for item_name, qty in lines:
+            for ingredient_id, per_portion in matrix.get(item_name, {}).items():
+                usage[ingredient_id] += per_portion * qty
+        usage = {ingredient_id: round(q, STOCK_DECIMALS) for ingredient_id, q in usage.items()}
+        return {ingredient_id: q for ingredient_id, q in usage.items() if q > 0}
+
+recipe_matrix = RecipeMatrix(MENU_CACHE_TTL)
+
+# Statuses in which an order's ingredients have been used
+STOCK_CONSUMING_STATUSES = {'preparing', 'ready', 'served', 'delivered'}
+
+def deduct_order_stock(cursor, order_id, created_by):
+    """Deduct the ingredients for every line of an order in one batch (see deduct_stock).
+       Returns (deducted, shortfalls). deducted is False when no recipe applied or something
+       was short; nothing is written then."""
+    cursor.execute(
+        "SELECT item_name, SUM(qty) FROM order_items WHERE order_id = %s GROUP BY item_name",
+        (order_id,)
+    )
+    usage = recipe_matrix.explode([(name, int(qty)) for name, qty in cursor.fetchall()])
+    if not usage:
+        return False, []
+    note = f"Order #{order_id}"
+    shortfalls = deduct_stock(cursor, [(i, q, note) for i, q in usage.items()], created_by)
+    return not shortfalls, shortfalls
+
+def restore_order_stock(cursor, order_id, created_by):
+    """Put back what deduct_order_stock took for an order, as 'adjustment' lines with the
+       same note. Works from the order's ledger lines, so recipe edits since do not matter.
+       Returns True if anything was restored."""
+    note = f"Order #{order_id}"
+    cursor.execute(
+        f"""SELECT t.ingredient_id, SUM({LEDGER_SIGNED_QTY})
+            FROM inventory_transactions t
+            WHERE t.transaction_type IN ('usage', 'adjustment')
+              AND t.created_at >= (SELECT created_at FROM orders WHERE id = %s)
+              AND t.note = %s
+            GROUP BY t.ingredient_id""",
+        (order_id, note)
+    )
+    restore = [(ingredient_id, round(-float(net), STOCK_DECIMALS)) for ingredient_id, net in cursor.fetchall()]
+    restore = [(ingredient_id, qty) for ingredient_id, qty in restore if qty > 0]
+    if not restore:
+        return False
+    derived = " UNION ALL ".join(["SELECT %s AS id, %s AS qty"] * len(restore))
+    cursor.execute(
+        f"""UPDATE ingredients i
+            JOIN ({derived}) d ON d.id = i.id
+            SET i.current_stock = i.current_stock + d.qty""",
+        [v for pair in restore for v in pair]
+    )
+    cursor.executemany(
+        "INSERT INTO inventory_transactions (ingredient_id, transaction_type, quantity, note, created_by) VALUES (%s, %s, %s, %s, %s)",
+        [(ingredient_id, 'adjustment', qty, note, created_by) for ingredient_id, qty in restore]
+    )
+    return True
+
+@app.route('/api/recipes', methods=['GET'])
+def get_recipes():
+    """All recipes, grouped by menu item."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute(
+            """SELECT r.menu_item_id, m.name AS menu_item, r.ingredient_id, i.name AS ingredient,
+                      r.quantity, i.unit
+               FROM recipes r
+               JOIN menu_items m ON m.id = r.menu_item_id
+               JOIN ingredients i ON i.id = r.ingredient_id
+               ORDER BY m.sort_order, m.id, i.name"""
+        )
+        recipes = collections.OrderedDict()
+        for row in [dict_from_row(cursor, r) for r in cursor.fetchall()]:
+            entry = recipes.setdefault(row['menu_item_id'], {
+                "menu_item_id": row['menu_item_id'], "menu_item": row['menu_item'], "ingredients": []
+            })
+            entry['ingredients'].append({
+                "ingredient_id": row['ingredient_id'], "name": row['ingredient'],
+                "quantity": float(row['quantity']), "unit": row['unit']
+            })
+        return jsonify({"success": True, "recipes": list(recipes.values())})
+    except Exception as e:
+        app.logger.exception("get_recipes error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/api/menu/<int:item_id>/recipe', methods=['PUT'])
+def set_recipe(item_id):
+    """Replace a menu item's recipe with [{ingredient_id, quantity}, ...] (per portion)."""
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('ingredients'), list):
+        return jsonify({"success": False, "message": "ingredients must be a list"}), 400
+    try:
+        rows = [(item_id, int(i['ingredient_id']), round(float(i['quantity']), STOCK_DECIMALS))
+                for i in data['ingredients']]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"success": False, "message": "Invalid ingredients format"}), 400
+    if any(q <= 0 for _, _, q in rows):
+        return jsonify({"success": False, "message": "Quantity must be positive"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("SELECT id FROM menu_items WHERE id = %s", (item_id,))
+        if not cursor.fetchone():
+            return jsonify({"success": False, "message": "Menu item not found"}), 404
+        cursor.execute("DELETE FROM recipes WHERE menu_item_id = %s", (item_id,))
+        if rows:
+            cursor.executemany(
+                "INSERT INTO recipes (menu_item_id, ingredient_id, quantity) VALUES (%s, %s, %s)", rows
+            )
+        mysql.connection.commit()
+        recipe_matrix.invalidate()
+        return jsonify({"success": True, "message": "Recipe saved"})
+    except MySQLdb.IntegrityError:
+        mysql.connection.rollback()
+        return jsonify({"success": False, "message": "Unknown or duplicate ingredient"}), 400
+    except Exception as e:
+        mysql.connection.rollback()
+        app.logger.exception("set_recipe error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
 # ---------------------------------
 # OWNER DASHBOARD PAGE (open access)
 # ---------------------------------
@@ -539,6 +1440,382 @@ def analytics():
 def payment():
     return render_template("paymentpage.html", logout_url=url_for('logout'))
 
+# -----------------------
+# Order events (Server-Sent Events)
+# -----------------------
+_redis_client = None
+
+def get_redis():
+    """Shared Redis client, or None when REDIS_URL is unset or redis-py is not installed."""
+    global _redis_client
+    if _redis_client is None and redis is not None and app.config.get('REDIS_URL'):
+        _redis_client = redis.Redis.from_url(app.config['REDIS_URL'])
+    return _redis_client
+
+class OrderEventBroker:
+    """Fans order events out to the SSE subscribers of this process.
+       With Redis configured, events are published on a channel instead and every
+       worker process relays what it receives to its own subscribers."""
+    CHANNEL = 'order-events'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._relay = None
+
+    def subscribe(self, limit=None):
+        """A queue that receives every event, or None when `limit` subscribers are open."""
+        q = queue.Queue(maxsize=100)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(q)
+        self._ensure_relay()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event):
+        client = get_redis()
+        if client is not None:
+            try:
+                client.publish(self.CHANNEL, json.dumps(event))
+                return
+            except Exception:
+                app.logger.exception("order event publish failed, delivering locally")
+        self._dispatch(event)
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass  # slow client: it resyncs from the changes feed on its next event
+
+    def _ensure_relay(self):
+        if get_redis() is None:
+            return
+        with self._lock:
+            if self._relay is not None and self._relay.is_alive():
+                return
+            self._relay = threading.Thread(target=self._relay_loop, name='order-event-relay', daemon=True)
+            self._relay.start()
+
+    def _relay_loop(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                for message in pubsub.listen():
+                    self._dispatch(json.loads(message['data']))
+            except Exception:
+                app.logger.exception("order event relay error, reconnecting")
+                time.sleep(2)
+
+order_events = OrderEventBroker()
+
+def publish_order_event(event_type, order_id, status=None):
+    order_events.publish({"type": event_type, "order_id": order_id, "status": status, "ts": time.time()})
+
+# Long-lived stream: needs a threaded worker (see Procfile). Streams end after
+# STREAM_MAX_SECONDS and EventSource reconnects on its own, so threads are recycled.
+# Each open stream holds one gthread thread, so a worker accepts at most
+# STREAM_MAX_SUBSCRIBERS (default a quarter of WEB_THREADS) and answers 503 beyond that;
+# the dashboards then poll /chef/orders/changes and retry the stream later. Deployments
+# with more screens than that should serve /stream/ from a separate async worker
+# (e.g. gunicorn -k gevent) rather than raise the cap.
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_MAX_SECONDS = 300
+app.config['STREAM_MAX_SUBSCRIBERS'] = int(os.getenv('STREAM_MAX_SUBSCRIBERS', max(1, app.config['WEB_THREADS'] // 4)))
+
+@app.route('/stream/orders')
+def stream_orders():
+    def generate(q):
+        try:
+            yield "retry: 3000\n\n"
+            deadline = time.monotonic() + STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    event = q.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: order\ndata: {json.dumps(event)}\n\n"
+        finally:
+            order_events.unsubscribe(q)
+
+    q = order_events.subscribe(limit=app.config['STREAM_MAX_SUBSCRIBERS'])
+    if q is None:
+        return jsonify({"success": False, "message": "Too many live streams, poll /chef/orders/changes"}), \
+            503, {'Retry-After': '60'}
+    response = Response(generate(q), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # also frees the slot when the client leaves before the stream started
+    response.call_on_close(lambda: order_events.unsubscribe(q))
+    return response
+
+# -----------------------
+# Response cache
+# -----------------------
+# JSON GET responses of the aggregate endpoints are cached per (path, query string) for
+# a TTL. Entries are tagged ('orders', 'ingredients', 'expenses'): a write bumps the
+# tag's version, which is part of the key, so entries built before it are never read
+# again and just age out. With Redis configured, entries and versions live there and
+# every worker shares them (give Redis an allkeys-lru maxmemory policy); otherwise each
+# process keeps its own LRU.
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key: the first caller runs the function,
+       the others wait for it and get its result (or its exception). Counts executed and
+       coalesced calls per label."""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = collections.defaultdict(collections.Counter)
+
+    def do(self, key, fn, label='default'):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            self.stats[label]['executed' if leader else 'coalesced'] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def metrics(self):
+        with self._lock:
+            in_flight = len(self._calls)
+            stats = {label: dict(c) for label, c in self.stats.items()}
+        for s in stats.values():
+            total = s.get('executed', 0) + s.get('coalesced', 0)
+            s['coalesced_ratio'] = round(s.get('coalesced', 0) / total, 3) if total else 0.0
+        return {"in_flight": in_flight, "by_endpoint": stats}
+
+# Shared by every coalesced view (and the response cache) in this process
+request_flight = SingleFlight()
+
+def flight_key(prefix):
+    return "|".join([prefix, request.path, str(sorted(request.args.items(multi=True)))])
+
+def coalesce_requests(view):
+    """Concurrent identical GET requests (same path and query string) in this worker share
+       one execution of the view; the response is copied to every caller."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        def render():
+            resp = app.make_response(view(*args, **kwargs))
+            return resp.get_data(), resp.status_code, resp.headers.to_wsgi_list()
+
+        body, status, headers = request_flight.do(flight_key('req'), render, view.__name__)
+        return Response(body, status=status, headers=headers)
+    return wrapper
+
+class LocalCacheBackend:
+    """In-process TTL + LRU store."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> (expires_at, body)
+        self._versions = collections.Counter()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, body, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions[t] for t in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for t in tags:
+                self._versions[t] += 1
+
+class RedisCacheBackend:
+    """Shared store: SETEX entries and INCR tag versions in Redis."""
+    PREFIX = 'respcache:'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(self.PREFIX + key)
+
+    def set(self, key, body, ttl):
+        self.client.set(self.PREFIX + key, body, ex=max(1, int(ttl)))
+
+    def versions(self, tags):
+        return [int(v or 0) for v in self.client.mget([self.PREFIX + 'v:' + t for t in tags])]
+
+    def bump(self, tags):
+        pipe = self.client.pipeline()
+        for t in tags:
+            pipe.incr(self.PREFIX + 'v:' + t)
+        pipe.execute()
+
+class ResponseCache:
+    def __init__(self, max_entries):
+        self._local = LocalCacheBackend(max_entries)
+        self.stats = collections.Counter()
+
+    @property
+    def backend(self):
+        client = get_redis()
+        return RedisCacheBackend(client) if client is not None else self._local
+
+    def cached(self, ttl, tags):
+        """Decorator for GET views returning JSON; only 200 responses are stored."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                backend = self.backend
+                try:
+                    versions = backend.versions(tags)
+                    raw = "|".join([request.path, str(sorted(request.args.items(multi=True)))]
+                                   + [f"{t}:{v}" for t, v in zip(tags, versions)])
+                    key = hashlib.sha1(raw.encode()).hexdigest()
+                    body = backend.get(key)
+                except Exception:
+                    app.logger.warning("response cache unavailable", exc_info=True)
+                    self.stats['errors'] += 1
+                    return view(*args, **kwargs)
+
+                if body is not None:
+                    self.stats['hits'] += 1
+                    resp = Response(body, mimetype='application/json')
+                    resp.headers['X-Cache'] = 'HIT'
+                    return resp
+
+                def render():
+                    # concurrent misses for the same key wait here for one computation
+                    resp = app.make_response(view(*args, **kwargs))
+                    if resp.status_code == 200 and resp.mimetype == 'application/json':
+                        try:
+                            backend.set(key, resp.get_data(), ttl)
+                        except Exception:
+                            app.logger.warning("response cache write failed", exc_info=True)
+                    return resp.get_data(), resp.status_code, resp.headers.to_wsgi_list()
+
+                self.stats['misses'] += 1
+                body, status, headers = request_flight.do('cache|' + key, render, view.__name__)
+                resp = Response(body, status=status, headers=headers)
+                resp.headers['X-Cache'] = 'MISS'
+                return resp
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        """Call after committing a write that changes data behind these tags."""
+        try:
+            self.backend.bump(tags)
+        except Exception:
+            # entries then stay stale until their TTL expires
+            app.logger.warning("response cache invalidation failed for %s", tags, exc_info=True)
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
+ANALYTICS_CACHE_TTL = 60  # seconds
+
+# -----------------------
+# Conditional GET for polled listings
+# -----------------------
+# Each listing has a row in resource_versions (migration 0010) that every writer bumps in
+# its own transaction, so the version changes exactly when a change commits.
+def bump_resource_versions(cursor, *resources):
+    """Advance the version of each resource; call just before committing the write."""
+    placeholders = ",".join(["%s"] * len(resources))
+    cursor.execute(f"UPDATE resource_versions SET version = version + 1 WHERE resource IN ({placeholders})",
+                   sorted(resources))
+
+def listing_etag(resources):
+    """ETag for a listing built from its resources' versions (a primary key lookup), or
+       None when a version row is missing."""
+    placeholders = ",".join(["%s"] * len(resources))
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute(f"SELECT resource, version FROM resource_versions WHERE resource IN ({placeholders})",
+                       list(resources))
+        versions = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+    if len(versions) != len(resources):
+        return None
+    return "-".join(f"{r}.{versions[r]}" for r in resources)
+
+def conditional_listing(*resources):
+    """Decorator for polled GET listings: a matching If-None-Match gets a 304 before the view
+       runs; otherwise the view runs coalesced (see coalesce_requests) and its 200 response
+       carries the ETag. The version is the first read of the request's transaction, so the
+       view reads the same snapshot, and followers get the leader's ETag with its body."""
+    def decorator(view):
+        @wraps(view)
+        def tagged(*args, **kwargs):
+            resp = app.make_response(view(*args, **kwargs))
+            etag = g.pop('_listing_etag', None)
+            if resp.status_code == 200 and etag:
+                resp.set_etag(etag)
+                resp.headers['Cache-Control'] = 'no-cache'
+            return resp
+
+        coalesced = coalesce_requests(tagged)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                etag = listing_etag(resources)
+            except Exception:
+                app.logger.warning("listing etag failed for %s", view.__name__, exc_info=True)
+                etag = None
+            if etag and request.if_none_match.contains(etag):
+                resp = Response(status=304)
+                resp.set_etag(etag)
+                resp.headers['Cache-Control'] = 'no-cache'
+                return resp
+            g._listing_etag = etag
+            return coalesced(*args, **kwargs)
+        return wrapper
+    return decorator
+
 # -----------------------
 # Order lifecycle endpoints (open)
 # -----------------------
@@ -568,20 +1845,33 @@ def create_order():
     if not cart or len(cart) == 0:
         return jsonify({"success": False, "message": "Cart is empty"}), 400
 
-    # Optional: server-side verify totals (recommended)
+    # Price every line from the menu catalog (client prices are ignored)
+    try:
+        prices = menu_catalog.prices()
+    except Exception as e:
+        app.logger.exception("create_order menu lookup error")
+        return jsonify({"success": False, "message": "DB error: " + str(e)}), 500
     try:
-        computed_subtotal = 0.0
+        lines = []
         for it in cart:
+            name = (it.get('name') or '').strip()[:255]
             qty = int(it.get('qty', 1))
-            unit_price = float(it.get('price', 0))
-            computed_subtotal += round(unit_price * qty, 2)
-        computed_subtotal = round(computed_subtotal, 2)
-        # we accept client's subtotal if matches computed (allow small floating diff)
-        if abs(computed_subtotal - subtotal) > 0.01:
-            # keep server computed value to avoid tampering
-            subtotal = computed_subtotal
-            # recompute final_total from discount (server authoritative)
-            final_total = round(subtotal - discount_amount, 2)
+            if qty <= 0:
+                raise ValueError("qty")
+            if name not in prices:
+                return jsonify({"success": False, "message": f"Unknown menu item: {name}"}), 400
+            unit_price = prices[name]
+            lines.append((name, qty, unit_price, round(unit_price * qty, 2)))
+    except Exception:
+        return jsonify({"success": False, "message": "Invalid cart format"}), 400
+
+    try:
+        # server computed totals are authoritative
+        subtotal = round(sum(line[3] for line in lines), 2)
+        if discount_percent:
+            discount_amount = round(subtotal * discount_percent / 100, 2)
+        discount_amount = min(max(discount_amount, 0.0), subtotal)
+        final_total = round(subtotal - discount_amount, 2)
     except Exception:
         return jsonify({"success": False, "message": "Invalid cart format"}), 400
 
@@ -599,19 +1889,17 @@ def create_order():
         )
         order_id = cursor.lastrowid
 
-        # Insert order_items (matching your schema: qty, unit_price, total_price)
-        for item in cart:
-            name = item.get('name')[:255] if item.get('name') else ''
-            qty = int(item.get('qty', 1))
-            unit_price = float(item.get('price', 0))
-            total_price = round(unit_price * qty, 2)
-
-            cursor.execute(
-                "INSERT INTO order_items (order_id, item_name, qty, unit_price, total_price) VALUES (%s,%s,%s,%s,%s)",
-                (order_id, name, qty, unit_price, total_price)
-            )
+        # Insert order_items (matching your schema: qty, unit_price, total_price).
+        # executemany sends all lines as one multi-row INSERT.
+        cursor.executemany(
+            "INSERT INTO order_items (order_id, item_name, qty, unit_price, total_price) VALUES (%s,%s,%s,%s,%s)",
+            [(order_id,) + line for line in lines]
+        )
 
+        rollup_add_order(cursor, order_id)
+        bump_resource_versions(cursor, 'orders')
         mysql.connection.commit()
+        response_cache.invalidate('orders')
 
     except Exception as e:
         mysql.connection.rollback()
@@ -621,40 +1909,145 @@ def create_order():
     finally:
         cursor.close()
 
+    publish_order_event('created', order_id, 'placed')
     return jsonify({"success": True, "order_id": order_id}), 201
 
+# Keyset pagination for order listings: pages are ordered by (created_at, id) and the
+# cursor is the position of the last row returned, e.g. "2025-11-08T19:02:11_512".
+ORDERS_PAGE_DEFAULT = 200
+ORDERS_PAGE_MAX = 1000
+
+def parse_iso_datetime(value):
+    """Parse 'YYYY-MM-DD' or 'YYYY-MM-DDTHH:MM:SS' query values. Returns None if empty."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.strip().replace(' ', 'T'))
+
+def encode_order_cursor(order):
+    return f"{order['created_at'].isoformat()}_{order['id']}"
+
+def decode_order_cursor(value):
+    created_at, _, order_id = value.rpartition('_')
+    return parse_iso_datetime(created_at), int(order_id)
+
 # Chef: list orders by status (uses current_status). Accepts status=all to return all orders.
+# Optional: limit, cursor (next_cursor of the previous page), since / until (created_at range,
+# since inclusive, until exclusive).
 @app.route('/chef/orders', methods=['GET'])
+@conditional_listing('orders')
 def chef_list_orders():
     status = request.args.get('status', 'placed')
-    cursor = mysql.connection.cursor()
     try:
-        if status == 'all':
-            cursor.execute(
-                "SELECT id, customer_name, subtotal, final_total, payment_status, current_status, created_at FROM orders ORDER BY created_at ASC"
-            )
-        else:
-            cursor.execute(
-                "SELECT id, customer_name, subtotal, final_total, payment_status, current_status, created_at FROM orders WHERE current_status = %s ORDER BY created_at ASC",
-                (status,)
-            )
-        rows = cursor.fetchall()
-        orders = [dict_from_row(cursor, r) for r in rows]
-
-        # Attach items for each order (safe: if there are none, set empty list)
-        for o in orders:
-            cursor.execute("SELECT id, item_name, qty, unit_price, total_price FROM order_items WHERE order_id = %s", (o['id'],))
-            item_rows = cursor.fetchall()
-            items = [dict_from_row(cursor, row) for row in item_rows]
-            o['items'] = items
+        limit = min(max(int(request.args.get('limit', ORDERS_PAGE_DEFAULT)), 1), ORDERS_PAGE_MAX)
+        since = parse_iso_datetime(request.args.get('since'))
+        until = parse_iso_datetime(request.args.get('until'))
+        after = decode_order_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except (ValueError, TypeError):
+        return jsonify({"success": False, "message": "Invalid limit, cursor or date"}), 400
+
+    where, params = [], []
+    if status != 'all':
+        where.append("current_status = %s")
+        params.append(status)
+    if since:
+        where.append("created_at >= %s")
+        params.append(since)
+    if until:
+        where.append("created_at < %s")
+        params.append(until)
+    if after:
+        where.append("(created_at > %s OR (created_at = %s AND id > %s))")
+        params.extend([after[0], after[0], after[1]])
+
+    # the kitchen queue (no date range) and recent ranges only touch the live tables
+    include_archive = bool(since or until) and reaches_archive(since)
 
-        return jsonify({"success": True, "orders": orders})
+    cursor = mysql.connection.cursor()
+    try:
+        # fetch one extra row to know whether another page exists
+        orders = fetch_orders_with_items(cursor, " AND ".join(where), params,
+                                         order_by="created_at ASC, id ASC", limit=limit + 1,
+                                         include_archive=include_archive)
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        next_cursor = encode_order_cursor(orders[-1]) if has_more else None
+
+        return jsonify({"success": True, "orders": orders, "has_more": has_more, "next_cursor": next_cursor})
     except Exception as e:
         app.logger.exception("chef_list_orders error")
         return jsonify({"success": False, "message": "Server error fetching orders: " + str(e)}), 500
     finally:
         cursor.close()
 
+# Incremental feed for the kitchen / waiter dashboards. Without `since` it only returns the
+# current watermark (the client then loads its snapshot via /chef/orders). With `since` it
+# returns orders whose updated_at >= since: the ones still matching `status` in "orders"
+# (with items), the ones that moved out of the filter in "removed" with their new status.
+# The bound is inclusive because updated_at has one-second resolution; clients merge by id.
+# updated_at is stamped when a row is written, not when it commits, so a slower transaction
+# can still commit a row dated before a watermark already handed out. The watermark is
+# therefore held ORDER_CHANGES_LAG seconds behind the database clock: every poll re-reads
+# that window and picks such rows up (clients see some orders twice, which merging absorbs).
+ORDER_CHANGES_MAX = 500
+ORDER_CHANGES_LAG = 10  # seconds; longer than any write transaction on orders should take
+WATERMARK_FLOOR = datetime(1970, 1, 2)
+
+def current_orders_watermark(cursor, newest=None):
+    """Position the next poll resumes from: `newest` (the latest updated_at already sent,
+       default the latest in the table), but no later than NOW() - ORDER_CHANGES_LAG."""
+    cursor.execute("SELECT MAX(updated_at), NOW() - INTERVAL %s SECOND FROM orders", (ORDER_CHANGES_LAG,))
+    latest, horizon = cursor.fetchone()
+    newest = newest or latest or WATERMARK_FLOOR
+    return max(min(newest, horizon), WATERMARK_FLOOR)
+
+@app.route('/chef/orders/changes', methods=['GET'])
+@coalesce_requests
+def chef_order_changes():
+    status = request.args.get('status', 'placed')
+    try:
+        since = parse_iso_datetime(request.args.get('since'))
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid since"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        if since is None:
+            watermark = current_orders_watermark(cursor)
+            return jsonify({"success": True, "watermark": watermark.isoformat()})
+
+        cursor.execute(
+            f"SELECT {ORDER_LIST_COLUMNS} FROM orders WHERE updated_at >= %s "
+            "ORDER BY updated_at ASC, id ASC LIMIT %s",
+            (since, ORDER_CHANGES_MAX + 1)
+        )
+        changed = [dict_from_row(cursor, r) for r in cursor.fetchall()]
+        if len(changed) > ORDER_CHANGES_MAX:
+            # too far behind: ask the client to reload its snapshot
+            watermark = current_orders_watermark(cursor)
+            return jsonify({"success": True, "resync": True, "watermark": watermark.isoformat()})
+
+        orders, removed = [], []
+        for o in changed:
+            if status == 'all' or o['current_status'] == status:
+                orders.append(o)
+            else:
+                removed.append({"id": o['id'], "current_status": o['current_status']})
+        attach_order_items(cursor, orders)
+
+        watermark = current_orders_watermark(cursor, max([since] + [o['updated_at'] for o in changed]))
+        return jsonify({
+            "success": True,
+            "resync": False,
+            "watermark": watermark.isoformat(),
+            "orders": orders,
+            "removed": removed
+        })
+    except Exception as e:
+        app.logger.exception("chef_order_changes error")
+        return jsonify({"success": False, "message": "Server error fetching order changes: " + str(e)}), 500
+    finally:
+        cursor.close()
+
 # Chef: update order status (uses current_status) — improved error handling
 @app.route('/chef/update_order_status', methods=['POST'])
 def chef_update_order_status():
@@ -671,12 +2064,45 @@ def chef_update_order_status():
 
     cursor = mysql.connection.cursor()
     try:
-        cursor.execute("UPDATE orders SET current_status = %s, updated_at = NOW() WHERE id = %s", (new_status, order_id))
-        if cursor.rowcount == 0:
+        cursor.execute("SELECT current_status, stock_deducted_at FROM orders WHERE id = %s FOR UPDATE", (order_id,))
+        row = cursor.fetchone()
+        if not row:
             mysql.connection.rollback()
             return jsonify({"success": False, "message": "Order not found"}), 404
+
+        # cooking or done: take the whole order's ingredients out of stock, once. A shortfall
+        # does not hold up the kitchen: it is logged and reported, nothing is deducted, and
+        # the next status change tries again (e.g. after a restock or a new recipe).
+        # Cancelling an order whose stock was taken puts it back.
+        created_by = session.get('user_id', 1)
+        deducted, restored, shortfalls = False, False, []
+        if new_status in STOCK_CONSUMING_STATUSES and row[1] is None:
+            deducted, shortfalls = deduct_order_stock(cursor, order_id, created_by)
+            if shortfalls:
+                app.logger.warning("order %s moved to %s without deducting stock: %s",
+                                   order_id, new_status, shortfalls)
+        elif new_status == 'cancelled' and row[1] is not None:
+            restored = restore_order_stock(cursor, order_id, created_by)
+
+        stock_column = ""
+        if deducted:
+            stock_column = ", stock_deducted_at = NOW()"
+        elif new_status == 'cancelled' and row[1] is not None:
+            stock_column = ", stock_deducted_at = NULL"
+        cursor.execute(
+            f"UPDATE orders SET current_status = %s, updated_at = NOW(){stock_column} WHERE id = %s",
+            (new_status, order_id)
+        )
+        rollup_status_change(cursor, order_id, row[0], new_status)
+        changed = ('orders', 'ingredients') if deducted or restored else ('orders',)
+        bump_resource_versions(cursor, *changed)
         mysql.connection.commit()
-        return jsonify({"success": True, "order_id": order_id, "new_status": new_status})
+        response_cache.invalidate(*changed)
+        publish_order_event('status', order_id, new_status)
+        result = {"success": True, "order_id": order_id, "new_status": new_status}
+        if shortfalls:
+            result.update(message="Status updated, but stock was not deducted", shortfalls=shortfalls)
+        return jsonify(result)
     except Exception as e:
         mysql.connection.rollback()
         app.logger.exception("chef_update_order_status error")
@@ -698,9 +2124,15 @@ def clerk_complete_order():
 
     cursor = mysql.connection.cursor()
     try:
+        cursor.execute("SELECT current_status FROM orders WHERE id = %s FOR UPDATE", (order_id,))
+        row = cursor.fetchone()
         cursor.execute("UPDATE orders SET current_status = %s, payment_status = %s, updated_at = NOW() WHERE id = %s",
                        ('delivered', payment_status, order_id))
+        if row:
+            rollup_status_change(cursor, order_id, row[0], 'delivered')
+        bump_resource_versions(cursor, 'orders')
         mysql.connection.commit()
+        response_cache.invalidate('orders')
     except Exception as e:
         mysql.connection.rollback()
         cursor.close()
@@ -708,26 +2140,32 @@ def clerk_complete_order():
     finally:
         cursor.close()
 
+    publish_order_event('status', order_id, 'delivered')
     return jsonify({"success": True, "order_id": order_id})
 
 # Owner: orders report (uses current_status)
 @app.route('/owner/orders_report', methods=['GET'])
+@coalesce_requests
 def owner_orders_report():
-    start = request.args.get('start')  # e.g. 2025-11-01
-    end = request.args.get('end')      # e.g. 2025-11-08
+    try:
+        start_dt = parse_date_arg(request.args.get('start'))  # e.g. 2025-11-01
+        end_dt = parse_date_arg(request.args.get('end'))      # e.g. 2025-11-08
+    except ValueError:
+        return jsonify({"success": False, "message": "Dates must be YYYY-MM-DD"}), 400
 
-    if not start or not end:
+    if not start_dt or not end_dt:
         end_dt = datetime.utcnow().date()
         start_dt = end_dt - timedelta(days=7)
-        start = start_dt.isoformat()
-        end = end_dt.isoformat()
+    start = start_dt.isoformat()
+    end = end_dt.isoformat()
 
+    orders_table, _ = order_tables(reaches_archive(day_range(start_dt)[0]))
     cursor = mysql.connection.cursor()
     try:
         cursor.execute(
             "SELECT id, customer_name, current_status, payment_status, subtotal, discount_amount, final_total, created_at "
-            "FROM orders WHERE DATE(created_at) BETWEEN %s AND %s ORDER BY created_at DESC",
-            (start, end)
+            f"FROM {orders_table} WHERE created_at >= %s AND created_at < %s ORDER BY created_at DESC",
+            day_range(start_dt, end_dt)
         )
         rows = cursor.fetchall()
         orders = [dict_from_row(cursor, r) for r in rows]
@@ -737,23 +2175,116 @@ def owner_orders_report():
     return jsonify({"success": True, "start": start, "end": end, "orders": orders})
 
 # Owner: sales summary
+def sales_summary_data(cursor, days):
+    cursor.execute(
+        "SELECT day, orders_count, net as total_sales "
+        "FROM sales_daily_rollup WHERE day >= DATE(DATE_SUB(NOW(), INTERVAL %s DAY)) ORDER BY day ASC",
+        (days,)
+    )
+    return [dict_from_row(cursor, r) for r in cursor.fetchall()]
+
 @app.route('/owner/sales_summary', methods=['GET'])
 def owner_sales_summary():
     days = int(request.args.get('days', 30))
     cursor = mysql.connection.cursor()
     try:
-        cursor.execute(
-            "SELECT DATE(created_at) as day, COUNT(*) as orders_count, SUM(final_total) as total_sales "
-            "FROM orders WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY) GROUP BY DATE(created_at) ORDER BY DATE(created_at) ASC",
-            (days,)
-        )
-        rows = cursor.fetchall()
-        summary = [dict_from_row(cursor, r) for r in rows]
+        summary = sales_summary_data(cursor, days)
     finally:
         cursor.close()
 
     return jsonify({"success": True, "days": days, "summary": summary})
 
+# Owner: per-day / per-month sales breakdown (used by daily_sales.html and monthly_sales.html).
+# Two GROUP BY queries: order totals per period, then item quantities / revenue per period.
+def sales_breakdown(cursor, period_expr, start, end):
+    """Aggregate orders with created_at in [start, end) by the SQL expression period_expr."""
+    orders_table, items_table = order_tables(reaches_archive(start))
+    cursor.execute(
+        f"SELECT {period_expr} AS period, COUNT(*) AS orders_count, "
+        "COALESCE(SUM(subtotal),0) AS gross, COALESCE(SUM(discount_amount),0) AS discounts, "
+        "COALESCE(SUM(final_total),0) AS net "
+        f"FROM {orders_table} WHERE created_at >= %s AND created_at < %s "
+        f"GROUP BY {period_expr} ORDER BY period ASC",
+        (start, end)
+    )
+    periods = {}
+    for row in cursor.fetchall():
+        p = dict_from_row(cursor, row)
+        periods[str(p['period'])] = {
+            "period": str(p['period']),
+            "orders_count": int(p['orders_count']),
+            "gross": float(p['gross']),
+            "discounts": float(p['discounts']),
+            "net": float(p['net']),
+            "items_sold": 0,
+            "items": []
+        }
+
+    item_period_expr = period_expr.replace('created_at', 'o.created_at')
+    cursor.execute(
+        f"SELECT {item_period_expr} AS period, oi.item_name, SUM(oi.qty) AS qty, SUM(oi.total_price) AS revenue "
+        f"FROM {items_table} oi JOIN {orders_table} o ON o.id = oi.order_id "
+        "WHERE o.created_at >= %s AND o.created_at < %s "
+        f"GROUP BY {item_period_expr}, oi.item_name ORDER BY period ASC, revenue DESC",
+        (start, end)
+    )
+    for period, item_name, qty, revenue in cursor.fetchall():
+        bucket = periods.get(str(period))
+        if bucket is None:
+            continue
+        qty = int(qty or 0)
+        revenue = float(revenue or 0)
+        bucket['items_sold'] += qty
+        bucket['items'].append({
+            "item_name": item_name,
+            "qty": qty,
+            "revenue": revenue,
+            "avg_unit_price": round(revenue / qty, 2) if qty else 0
+        })
+    return list(periods.values())
+
+@app.route('/owner/sales/daily', methods=['GET'])
+@coalesce_requests
+def owner_sales_daily():
+    """Per-day totals and item revenue. start / end are inclusive dates (default: last 30 days)."""
+    try:
+        end = parse_date_arg(request.args.get('end')) or datetime.now().date()
+        start = parse_date_arg(request.args.get('start')) or end - timedelta(days=29)
+    except ValueError:
+        return jsonify({"success": False, "message": "Dates must be YYYY-MM-DD"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        days = sales_breakdown(cursor, "DATE(created_at)", *day_range(start, end))
+        return jsonify({"success": True, "start": start.isoformat(), "end": end.isoformat(), "days": days})
+    except Exception as e:
+        app.logger.exception("owner_sales_daily error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/owner/sales/monthly', methods=['GET'])
+@coalesce_requests
+def owner_sales_monthly():
+    """Per-month totals and item revenue. start / end are inclusive YYYY-MM (default: current year)."""
+    try:
+        today = datetime.now().date()
+        start = parse_date_arg(request.args.get('start') or f"{today.year}-01", '%Y-%m')
+        end = parse_date_arg(request.args.get('end') or f"{today.year}-12", '%Y-%m')
+    except ValueError:
+        return jsonify({"success": False, "message": "Months must be YYYY-MM"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        # '%%' because the query is parameterised
+        months = sales_breakdown(cursor, "DATE_FORMAT(created_at, '%%Y-%%m')", *month_range(start, end))
+        return jsonify({"success": True, "start": start.strftime('%Y-%m'), "end": end.strftime('%Y-%m'), "months": months})
+    except Exception as e:
+        app.logger.exception("owner_sales_monthly error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
 # Generic 500 handler to avoid raw tracebacks in browser (useful while testing)
 @app.errorhandler(500)
 def internal_error(e):
@@ -764,40 +2295,43 @@ def internal_error(e):
 # ---------------------------------
 # Manager: metrics endpoint (for manager_dash.html)
 # ---------------------------------
+def manager_metrics_data(cursor):
+    # Total sales & orders for today
+    cursor.execute(
+        "SELECT COALESCE(SUM(final_total),0) AS total_sales, COUNT(*) AS total_orders "
+        "FROM orders WHERE created_at >= %s AND created_at < %s",
+        day_range(datetime.now().date())
+    )
+    row = cursor.fetchone() or (0, 0)
+    if cursor.description:
+        cols = [c[0] for c in cursor.description]
+        mapped = dict(zip(cols, row))
+        total_sales_today = float(mapped.get('total_sales') or 0)
+        total_orders_today = int(mapped.get('total_orders') or 0)
+    else:
+        total_sales_today = float(row[0] or 0)
+        total_orders_today = int(row[1] or 0)
+
+    # Get low stock count from ingredients
+    cursor.execute("SELECT COUNT(*) FROM ingredients WHERE current_stock <= reorder_level")
+    low_stock_count = int(cursor.fetchone()[0] or 0)
+
+    # Get pending purchase orders count
+    cursor.execute("SELECT COUNT(*) FROM purchase_orders WHERE status = 'pending'")
+    pending_pos = int(cursor.fetchone()[0] or 0)
+
+    return {
+        "total_sales_today": total_sales_today,
+        "total_orders_today": total_orders_today,
+        "low_stock_count": low_stock_count,
+        "pending_pos": pending_pos
+    }
+
 @app.route('/owner/manager_metrics', methods=['GET'])
 def owner_manager_metrics():
     cursor = mysql.connection.cursor()
     try:
-        # Total sales & orders for today
-        cursor.execute(
-            "SELECT COALESCE(SUM(final_total),0) AS total_sales, COUNT(*) AS total_orders "
-            "FROM orders WHERE DATE(created_at) = CURDATE()"
-        )
-        row = cursor.fetchone() or (0, 0)
-        if cursor.description:
-            cols = [c[0] for c in cursor.description]
-            mapped = dict(zip(cols, row))
-            total_sales_today = float(mapped.get('total_sales') or 0)
-            total_orders_today = int(mapped.get('total_orders') or 0)
-        else:
-            total_sales_today = float(row[0] or 0)
-            total_orders_today = int(row[1] or 0)
-
-        # Get low stock count from ingredients
-        cursor.execute("SELECT COUNT(*) FROM ingredients WHERE current_stock <= reorder_level")
-        low_stock_count = int(cursor.fetchone()[0] or 0)
-
-        # Get pending purchase orders count
-        cursor.execute("SELECT COUNT(*) FROM purchase_orders WHERE status = 'pending'")
-        pending_pos = int(cursor.fetchone()[0] or 0)
-
-        return jsonify({
-            "success": True,
-            "total_sales_today": total_sales_today,
-            "total_orders_today": total_orders_today,
-            "low_stock_count": low_stock_count,
-            "pending_pos": pending_pos
-        })
+        return jsonify(dict(success=True, **manager_metrics_data(cursor)))
     except Exception as e:
         app.logger.exception("owner_manager_metrics error")
         return jsonify({"success": False, "message": str(e)}), 500
@@ -807,44 +2341,73 @@ def owner_manager_metrics():
 # ---------------------------------
 # Manager: ingredient / item usage (top sold items)
 # ---------------------------------
+def item_usage_data(cursor, days):
+    cursor.execute(
+        """
+        SELECT item_name AS item, SUM(qty) AS qty
+          FROM item_daily_rollup
+         WHERE day >= DATE(DATE_SUB(NOW(), INTERVAL %s DAY))
+         GROUP BY item_name
+         ORDER BY qty DESC
+         LIMIT 25
+        """,
+        (days,)
+    )
+    rows = cursor.fetchall()
+    usage = [dict_from_row(cursor, r) for r in rows]
+    # Normalize qty to int
+    for u in usage:
+        if 'qty' in u:
+            try:
+                u['qty'] = int(u['qty'])
+            except Exception:
+                u['qty'] = float(u['qty'] or 0)
+    return usage
+
 @app.route('/owner/ingredient_usage', methods=['GET'])
 def owner_ingredient_usage():
     days = int(request.args.get('days', 30))
     cursor = mysql.connection.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT oi.item_name AS item, SUM(oi.qty) AS qty
-              FROM order_items oi
-              JOIN orders o ON o.id = oi.order_id
-             WHERE o.created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-             GROUP BY oi.item_name
-             ORDER BY qty DESC
-             LIMIT 25
-            """,
-            (days,)
-        )
-        rows = cursor.fetchall()
-        usage = [dict_from_row(cursor, r) for r in rows]
-        # Normalize qty to int
-        for u in usage:
-            if 'qty' in u:
-                try:
-                    u['qty'] = int(u['qty'])
-                except Exception:
-                    u['qty'] = float(u['qty'] or 0)
-        return jsonify({"success": True, "days": days, "usage": usage})
+        return jsonify({"success": True, "days": days, "usage": item_usage_data(cursor, days)})
     except Exception as e:
         app.logger.exception("owner_ingredient_usage error")
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
         cursor.close()
 
+# ---------------------------------
+# Manager: dashboard snapshot (metrics + 30-day sales + top items in one response)
+# ---------------------------------
+# Every open manager screen polls this; the short shared TTL plus request coalescing
+# mean one recomputation per interval however many screens are open.
+DASHBOARD_SNAPSHOT_TTL = 5  # seconds
+DASHBOARD_DAYS = 30
+
+@app.route('/owner/dashboard_snapshot', methods=['GET'])
+@response_cache.cached(DASHBOARD_SNAPSHOT_TTL, ('orders', 'ingredients', 'purchase_orders'))
+def owner_dashboard_snapshot():
+    cursor = mysql.connection.cursor()
+    try:
+        return jsonify({
+            "success": True,
+            "metrics": manager_metrics_data(cursor),
+            "sales_summary": sales_summary_data(cursor, DASHBOARD_DAYS),
+            "item_usage": item_usage_data(cursor, DASHBOARD_DAYS),
+            "generated_at": datetime.now().isoformat(timespec='seconds')
+        })
+    except Exception as e:
+        app.logger.exception("owner_dashboard_snapshot error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
 # ---------------------------------
 # EMPLOYEE MANAGEMENT API ROUTES
 # ---------------------------------
 
 @app.route('/api/employees')
+@conditional_listing('employees')
 def get_employees():
     """Get all employees with details from both users and employees tables"""
     cursor = mysql.connection.cursor()
@@ -932,7 +2495,9 @@ def add_employee():
             (user_id, name, email, role, 'active')
         )
         
+        bump_resource_versions(cursor, 'employees')
         mysql.connection.commit()
+        response_cache.invalidate('employees')
         
         return jsonify({
             'success': True, 
@@ -967,7 +2532,9 @@ def delete_employee(employee_id):
         # Delete from users table
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         
+        bump_resource_versions(cursor, 'employees')
         mysql.connection.commit()
+        response_cache.invalidate('employees')
         
         return jsonify({'success': True, 'message': 'Employee deleted successfully'})
         
@@ -995,7 +2562,9 @@ def update_employee_status(employee_id):
             "UPDATE employees SET status = %s WHERE id = %s",
             (new_status, employee_id)
         )
+        bump_resource_versions(cursor, 'employees')
         mysql.connection.commit()
+        response_cache.invalidate('employees')
         
         return jsonify({'success': True, 'message': f'Employee status updated to {new_status}'})
         
@@ -1046,6 +2615,7 @@ def reset_employee_password(employee_id):
 
 # Get all ingredients with stock status
 @app.route('/api/ingredients', methods=['GET'])
+@conditional_listing('ingredients')
 def get_ingredients():
     cursor = mysql.connection.cursor()
     try:
@@ -1073,7 +2643,7 @@ def use_ingredient(ingredient_id):
     if not data:
         return jsonify({"success": False, "message": "Invalid JSON"}), 400
     
-    quantity = float(data.get('quantity', 0))
+    quantity = round(float(data.get('quantity', 0)), STOCK_DECIMALS)
     note = data.get('note', '')
     
     if quantity <= 0:
@@ -1081,22 +2651,22 @@ def use_ingredient(ingredient_id):
     
     cursor = mysql.connection.cursor()
     try:
-        # Check current stock
+        # Deduct in place; the WHERE guard makes concurrent deductions safe
+        cursor.execute(
+            "UPDATE ingredients SET current_stock = current_stock - %s WHERE id = %s AND current_stock >= %s",
+            (quantity, ingredient_id, quantity)
+        )
+        deducted = cursor.rowcount == 1
+
+        # The row is locked by our UPDATE, so this reads the committed-to-be value
         cursor.execute("SELECT current_stock FROM ingredients WHERE id = %s", (ingredient_id,))
         result = cursor.fetchone()
         if not result:
             return jsonify({"success": False, "message": "Ingredient not found"}), 404
-        
-        current_stock = float(result[0])
-        if current_stock < quantity:
-            return jsonify({"success": False, "message": "Insufficient stock"}), 400
-        
-        # Update stock
-        new_stock = current_stock - quantity
-        cursor.execute(
-            "UPDATE ingredients SET current_stock = %s WHERE id = %s",
-            (new_stock, ingredient_id)
-        )
+        new_stock = float(result[0])
+        if not deducted:
+            mysql.connection.rollback()
+            return jsonify({"success": False, "message": "Insufficient stock", "current_stock": new_stock}), 400
         
         # Record transaction - FIXED: Use shorter transaction types
         cursor.execute(
@@ -1104,7 +2674,9 @@ def use_ingredient(ingredient_id):
             (ingredient_id, 'usage', quantity, note, session.get('user_id', 1))
         )
         
+        bump_resource_versions(cursor, 'ingredients')
         mysql.connection.commit()
+        response_cache.invalidate('ingredients')
         return jsonify({"success": True, "new_stock": new_stock})
         
     except Exception as e:
@@ -1113,8 +2685,91 @@ def use_ingredient(ingredient_id):
     finally:
         cursor.close()
 
+def deduct_stock(cursor, usage, created_by, transaction_type='usage'):
+    """Deduct a batch of ingredient quantities with one multi-row UPDATE and log each
+       line with one multi-row INSERT. usage is a list of (ingredient_id, quantity, note).
+
+       All or nothing: the rows are locked and checked first, and if any ingredient is
+       missing or short nothing is written and the shortfalls ({id, name, requested,
+       available, reason}) are returned; the caller then rolls back. Returns an empty
+       list on success; the caller commits."""
+    totals = collections.OrderedDict()
+    for ingredient_id, quantity, _ in usage:
+        # re-round each sum: 0.1 + 0.2 would otherwise be refused against a stock of 0.300
+        totals[ingredient_id] = round(totals.get(ingredient_id, 0) + quantity, STOCK_DECIMALS)
+
+    # FOR UPDATE holds the rows until commit, so the check below stays true for the UPDATE
+    placeholders = ",".join(["%s"] * len(totals))
+    cursor.execute(f"SELECT id, name, current_stock FROM ingredients WHERE id IN ({placeholders}) FOR UPDATE",
+                   list(totals))
+    found = {row[0]: (row[1], float(row[2])) for row in cursor.fetchall()}
+    shortfalls = []
+    for ingredient_id, requested in totals.items():
+        if ingredient_id not in found:
+            shortfalls.append({"id": ingredient_id, "name": None, "requested": requested,
+                               "available": 0.0, "reason": "not_found"})
+        elif found[ingredient_id][1] < requested:
+            name, available = found[ingredient_id]
+            shortfalls.append({"id": ingredient_id, "name": name, "requested": requested,
+                               "available": available, "reason": "insufficient"})
+    if shortfalls:
+        return shortfalls
+
+    derived = " UNION ALL ".join(["SELECT %s AS id, %s AS qty"] * len(totals))
+    cursor.execute(
+        f"""UPDATE ingredients i
+            JOIN ({derived}) d ON d.id = i.id
+            SET i.current_stock = i.current_stock - d.qty""",
+        [v for pair in totals.items() for v in pair]
+    )
+
+    cursor.executemany(
+        "INSERT INTO inventory_transactions (ingredient_id, transaction_type, quantity, note, created_by) VALUES (%s, %s, %s, %s, %s)",
+        [(ingredient_id, transaction_type, quantity, note, created_by) for ingredient_id, quantity, note in usage]
+    )
+    return []
+
+# Record usage of several ingredients (e.g. a whole dish) in one transaction
+@app.route('/api/ingredients/use-batch', methods=['POST'])
+def use_ingredients_batch():
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return jsonify({"success": False, "message": "items must be a non-empty list"}), 400
+
+    try:
+        usage = []
+        for item in data['items']:
+            quantity = round(float(item.get('quantity', 0)), STOCK_DECIMALS)
+            if quantity <= 0:
+                return jsonify({"success": False, "message": "Quantity must be positive"}), 400
+            usage.append((int(item['ingredient_id']), quantity, item.get('note') or data.get('note', '')))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({"success": False, "message": "Invalid items format"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        shortfalls = deduct_stock(cursor, usage, session.get('user_id', 1))
+        if shortfalls:
+            mysql.connection.rollback()
+            return jsonify({"success": False, "message": "Insufficient stock", "shortfalls": shortfalls}), 400
+
+        ids = sorted({u[0] for u in usage})
+        cursor.execute(f"SELECT id, current_stock FROM ingredients WHERE id IN ({','.join(['%s'] * len(ids))})", ids)
+        new_stock = {row[0]: float(row[1]) for row in cursor.fetchall()}
+        bump_resource_versions(cursor, 'ingredients')
+        mysql.connection.commit()
+        response_cache.invalidate('ingredients')
+        return jsonify({"success": True, "new_stock": new_stock})
+    except Exception as e:
+        mysql.connection.rollback()
+        app.logger.exception("use_ingredients_batch error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
 # Get low stock ingredients
 @app.route('/api/ingredients/low-stock', methods=['GET'])
+@coalesce_requests
 def get_low_stock():
     cursor = mysql.connection.cursor()
     try:
@@ -1132,6 +2787,25 @@ def get_low_stock():
     finally:
         cursor.close()
 
+def create_purchase_order(cursor, lines, supplier_info, created_by, status='pending'):
+    """Insert a PO header and its lines in three statements, whatever the PO size.
+       lines is [(ingredient_id, quantity, unit_price, total_price), ...].
+       Returns (po_id, po_number); the caller commits."""
+    cursor.execute("INSERT INTO po_number_seq () VALUES ()")
+    po_number = f"PO-{datetime.now():%Y%m%d}-{cursor.lastrowid:06d}"
+
+    cursor.execute(
+        "INSERT INTO purchase_orders (po_number, status, total_amount, supplier_info, created_by) VALUES (%s, %s, %s, %s, %s)",
+        (po_number, status, round(sum(line[3] for line in lines), 2), json.dumps(supplier_info), created_by)
+    )
+    po_id = cursor.lastrowid
+
+    cursor.executemany(
+        "INSERT INTO purchase_order_items (po_id, ingredient_id, quantity, unit_price, total_price) VALUES (%s, %s, %s, %s, %s)",
+        [(po_id,) + tuple(line) for line in lines]
+    )
+    return po_id, po_number
+
 # Generate Purchase Order
 @app.route('/api/generate-po', methods=['POST'])
 def generate_purchase_order():
@@ -1144,55 +2818,421 @@ def generate_purchase_order():
     
     if not items:
         return jsonify({"success": False, "message": "No items selected"}), 400
+
+    # Validate and price every line before touching the database
+    try:
+        lines = []
+        for item in items:
+            quantity = round(float(item['quantity']), STOCK_DECIMALS)
+            unit_price = float(item.get('unit_price', 0) or 0)
+            if quantity <= 0 or unit_price < 0:
+                raise ValueError
+            lines.append((int(item['ingredient_id']), quantity, unit_price, round(quantity * unit_price, 2)))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"success": False, "message": "Invalid item: ingredient_id and a positive quantity are required"}), 400
     
     cursor = mysql.connection.cursor()
     try:
-        # Generate PO number
-        from datetime import datetime
-        po_number = f"PO-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        
-        # Create purchase order
-        cursor.execute(
-            "INSERT INTO purchase_orders (po_number, supplier_info, created_by) VALUES (%s, %s, %s)",
-            (po_number, json.dumps(supplier_info), session.get('user_id', 1))
-        )
-        po_id = cursor.lastrowid
-        
-        total_amount = 0
-        # Add PO items
-        for item in items:
-            ingredient_id = item['ingredient_id']
-            quantity = float(item['quantity'])
-            unit_price = float(item.get('unit_price', 0))
-            total_price = quantity * unit_price
-            total_amount += total_price
-            
-            cursor.execute(
-                "INSERT INTO purchase_order_items (po_id, ingredient_id, quantity, unit_price, total_price) VALUES (%s, %s, %s, %s, %s)",
-                (po_id, ingredient_id, quantity, unit_price, total_price)
-            )
-        
-        # Update PO total
-        cursor.execute(
-            "UPDATE purchase_orders SET total_amount = %s WHERE id = %s",
-            (total_amount, po_id)
-        )
-        
+        po_id, po_number = create_purchase_order(cursor, lines, supplier_info, session.get('user_id', 1))
+        bump_resource_versions(cursor, 'purchase_orders')
         mysql.connection.commit()
+        response_cache.invalidate('purchase_orders')
         return jsonify({"success": True, "po_id": po_id, "po_number": po_number})
-        
+
+    except MySQLdb.IntegrityError:
+        mysql.connection.rollback()
+        return jsonify({"success": False, "message": "Unknown ingredient in PO items"}), 400
+    except Exception as e:
+        mysql.connection.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+# -----------------------
+# Reorder engine
+# -----------------------
+# An ingredient is reordered when stock plus open PO quantities would not last the
+# supplier lead time (plus reorder_level as safety stock). It is then topped up to
+# cover REORDER_COVER_DAYS of recent usage. Daily usage is averaged over the last
+# REORDER_WINDOW_DAYS of 'usage' transactions.
+REORDER_WINDOW_DAYS = 28
+REORDER_LEAD_DAYS = 3
+REORDER_COVER_DAYS = 14
+UNASSIGNED_SUPPLIER = "Unassigned"
+
+def reorder_suggestions(cursor, window_days=REORDER_WINDOW_DAYS, lead_days=REORDER_LEAD_DAYS,
+                        cover_days=REORDER_COVER_DAYS):
+    """Suggested order quantities for every ingredient that needs one, computed in one
+       query. The supplier and unit price come from the ingredient's latest PO line."""
+    since = datetime.now() - timedelta(days=window_days)
+    cursor.execute("""
+        SELECT id, name, unit, current_stock, reorder_level, daily_usage, on_order,
+               CEIL(GREATEST(reorder_level + daily_usage * %s, reorder_level * 2)
+                    - current_stock - on_order) AS suggested_quantity,
+               COALESCE(unit_price, 0) AS unit_price, supplier_name, supplier_contact
+        FROM (
+            SELECT i.id, i.name, i.unit, i.current_stock, i.reorder_level,
+                   COALESCE(u.used, 0) / %s AS daily_usage,
+                   COALESCE(p.pending, 0) AS on_order,
+                   lp.unit_price,
+                   JSON_UNQUOTE(JSON_EXTRACT(lp.supplier_info, '$.name')) AS supplier_name,
+                   JSON_UNQUOTE(JSON_EXTRACT(lp.supplier_info, '$.contact')) AS supplier_contact
+            FROM ingredients i
+            LEFT JOIN (
+                SELECT ingredient_id, SUM(quantity) AS used
+                FROM inventory_transactions
+                WHERE transaction_type = 'usage' AND created_at >= %s
+                GROUP BY ingredient_id
+            ) u ON u.ingredient_id = i.id
+            LEFT JOIN (
+                SELECT poi.ingredient_id, SUM(poi.quantity) AS pending
+                FROM purchase_order_items poi
+                JOIN purchase_orders po ON po.id = poi.po_id
+                WHERE po.status IN ('pending', 'ordered')
+                GROUP BY poi.ingredient_id
+            ) p ON p.ingredient_id = i.id
+            LEFT JOIN (
+                SELECT poi.ingredient_id, poi.unit_price, po.supplier_info,
+                       ROW_NUMBER() OVER (PARTITION BY poi.ingredient_id ORDER BY poi.id DESC) AS rn
+                FROM purchase_order_items poi
+                JOIN purchase_orders po ON po.id = poi.po_id
+                WHERE po.status <> 'cancelled'
+            ) lp ON lp.ingredient_id = i.id AND lp.rn = 1
+        ) s
+        WHERE current_stock + on_order <= reorder_level + daily_usage * %s
+          AND GREATEST(reorder_level + daily_usage * %s, reorder_level * 2) - current_stock - on_order > 0
+        ORDER BY supplier_name, name
+    """, (cover_days, window_days, since, lead_days, cover_days))
+
+    suggestions = []
+    for row in [dict_from_row(cursor, r) for r in cursor.fetchall()]:
+        for key in ('current_stock', 'reorder_level', 'daily_usage', 'on_order', 'suggested_quantity', 'unit_price'):
+            row[key] = round(float(row[key] or 0), 3)
+        row['supplier_name'] = row['supplier_name'] or UNASSIGNED_SUPPLIER
+        suggestions.append(row)
+    return suggestions
+
+def create_reorder_drafts(cursor, suggestions, created_by):
+    """Turn suggestions into one pending (draft) PO per supplier. Returns the POs created;
+       the caller commits. Drafts count as on-order, so running again does not duplicate."""
+    by_supplier = collections.OrderedDict()
+    for s in suggestions:
+        by_supplier.setdefault((s['supplier_name'], s['supplier_contact']), []).append(s)
+
+    created = []
+    for (supplier_name, supplier_contact), rows in by_supplier.items():
+        lines = [(s['id'], s['suggested_quantity'], s['unit_price'],
+                  round(s['suggested_quantity'] * s['unit_price'], 2)) for s in rows]
+        supplier_info = {"name": supplier_name, "contact": supplier_contact or '', "auto_generated": True}
+        po_id, po_number = create_purchase_order(cursor, lines, supplier_info, created_by)
+        created.append({"po_id": po_id, "po_number": po_number, "supplier": supplier_name, "lines": len(lines)})
+    return created
+
+def reorder_params():
+    """window/lead/cover day overrides from the query string."""
+    return dict(
+        window_days=max(1, request.args.get('window_days', REORDER_WINDOW_DAYS, type=int)),
+        lead_days=max(0, request.args.get('lead_days', REORDER_LEAD_DAYS, type=int)),
+        cover_days=max(1, request.args.get('cover_days', REORDER_COVER_DAYS, type=int))
+    )
+
+@app.route('/api/reorder/suggestions', methods=['GET'])
+@coalesce_requests
+def get_reorder_suggestions():
+    cursor = mysql.connection.cursor()
+    try:
+        return jsonify({"success": True, "suggestions": reorder_suggestions(cursor, **reorder_params())})
+    except Exception as e:
+        app.logger.exception("get_reorder_suggestions error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/api/reorder/run', methods=['POST'])
+def run_reorder():
+    """Create draft POs (status 'pending') for the current suggestions, one per supplier."""
+    cursor = mysql.connection.cursor()
+    try:
+        suggestions = reorder_suggestions(cursor, **reorder_params())
+        created = create_reorder_drafts(cursor, suggestions, session.get('user_id', 1))
+        bump_resource_versions(cursor, 'purchase_orders')
+        mysql.connection.commit()
+        response_cache.invalidate('purchase_orders')
+        return jsonify({"success": True, "purchase_orders": created})
     except Exception as e:
         mysql.connection.rollback()
+        app.logger.exception("run_reorder error")
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
         cursor.close()
 
+@app.cli.command('reorder')
+def reorder_command():
+    """Create draft POs for low stock (schedule it, e.g. daily): flask --app mainapp reorder"""
+    cursor = mysql.connection.cursor()
+    try:
+        created = create_reorder_drafts(cursor, reorder_suggestions(cursor), 1)
+        bump_resource_versions(cursor, 'purchase_orders')
+        mysql.connection.commit()
+        response_cache.invalidate('purchase_orders')
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    for po in created:
+        print(f"{po['po_number']}  {po['supplier']}  ({po['lines']} lines)")
+    print(f"{len(created)} draft purchase order(s) created")
+
+# -----------------------
+# Consumption forecast
+# -----------------------
+FORECAST_HISTORY_DAYS = 90
+FORECAST_ALPHA = 0.3  # EWMA smoothing: weight of the most recent day
+FORECAST_MA_DAYS = 7
+
+def forecast_usage(ingredient_ids, usage_rows, first_day, n_days, alpha=FORECAST_ALPHA):
+    """Daily demand for all ingredients at once. usage_rows is [(ingredient_id, day, qty)]
+       for complete days first_day .. first_day + n_days - 1. Returns (ewma, moving_avg),
+       both arrays aligned with ingredient_ids; days without usage count as zero."""
+    usage = np.zeros((len(ingredient_ids), n_days))
+    if usage_rows:
+        row_of = {ingredient_id: i for i, ingredient_id in enumerate(ingredient_ids)}
+        rows = np.array([row_of.get(r[0], -1) for r in usage_rows])
+        cols = np.array([(r[1] - first_day).days for r in usage_rows])
+        qty = np.array([float(r[2]) for r in usage_rows])
+        keep = (rows >= 0) & (cols >= 0) & (cols < n_days)
+        np.add.at(usage, (rows[keep], cols[keep]), qty[keep])
+
+    # EWMA over the whole window as one matrix-vector product: weight (1-alpha)^age
+    weights = (1 - alpha) ** np.arange(n_days - 1, -1, -1)
+    ewma = usage @ (weights / weights.sum())
+    moving_avg = usage[:, -min(FORECAST_MA_DAYS, n_days):].mean(axis=1)
+    return ewma, moving_avg
+
+@app.route('/api/ingredients/forecast', methods=['GET'])
+@coalesce_requests
+def get_ingredient_forecast():
+    """Forecast daily demand and days until stockout for every ingredient."""
+    history_days = min(max(request.args.get('history_days', FORECAST_HISTORY_DAYS, type=int), 7), 730)
+    alpha = min(max(request.args.get('alpha', FORECAST_ALPHA, type=float), 0.01), 1.0)
+    started = time.perf_counter()
+
+    today = datetime.now().date()
+    first_day = today - timedelta(days=history_days)
+    start, end = day_range(first_day, today - timedelta(days=1))
+
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("SELECT id, name, unit, current_stock, reorder_level FROM ingredients ORDER BY name")
+        ingredients = cursor.fetchall()
+        cursor.execute(f"""
+            SELECT ingredient_id, DATE(created_at) AS day, SUM(quantity)
+            FROM {ledger_table(start)}
+            WHERE transaction_type = 'usage' AND created_at >= %s AND created_at < %s
+            GROUP BY ingredient_id, DATE(created_at)
+        """, (start, end))
+        usage_rows = cursor.fetchall()
+    except Exception as e:
+        app.logger.exception("get_ingredient_forecast error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+    ewma, moving_avg = forecast_usage([r[0] for r in ingredients], usage_rows, first_day, history_days, alpha)
+    stock = np.array([float(r[3] or 0) for r in ingredients])
+    reorder_level = np.array([float(r[4] or 0) for r in ingredients])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_left = np.where(ewma > 0, stock / ewma, np.inf)
+        days_to_reorder = np.where(ewma > 0, np.maximum(stock - reorder_level, 0) / ewma, np.inf)
+
+    forecast = []
+    for i, (ingredient_id, name, unit, _, _) in enumerate(ingredients):
+        stockout = None if np.isinf(days_left[i]) else round(float(days_left[i]), 1)
+        forecast.append({
+            "id": ingredient_id,
+            "name": name,
+            "unit": unit,
+            "current_stock": float(stock[i]),
+            "daily_demand_ewma": round(float(ewma[i]), 3),
+            "daily_demand_ma7": round(float(moving_avg[i]), 3),
+            "days_until_stockout": stockout,
+            "stockout_date": None if stockout is None else (today + timedelta(days=int(days_left[i]))).isoformat(),
+            "days_until_reorder": None if np.isinf(days_to_reorder[i]) else round(float(days_to_reorder[i]), 1)
+        })
+    forecast.sort(key=lambda f: (f['days_until_stockout'] is None, f['days_until_stockout'] or 0))
+
+    return jsonify({
+        "success": True,
+        "history_days": history_days,
+        "alpha": alpha,
+        "forecast": forecast,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
+
+# -----------------------
+# Inventory ledger & snapshots
+# -----------------------
+# inventory_transactions is the stock ledger: 'usage' rows take stock out, every other
+# type adds its (signed) quantity. inventory_snapshots stores the ledger balance at a
+# point in time so that stock at X only replays the transactions after the last
+# snapshot before X.
+LEDGER_SIGNED_QTY = "CASE WHEN t.transaction_type = 'usage' THEN -t.quantity ELSE t.quantity END"
+
+def ledger_table(replay_from):
+    """Transactions to replay from a snapshot (None = from the beginning): the live
+       table, or the live + archive view when the replay starts before archive_horizon()."""
+    return "inventory_transactions_all" if reaches_archive(replay_from) else "inventory_transactions"
+
+def latest_snapshot_at(cursor, at=None):
+    """Time of the newest snapshot taken at or before `at` (now if None), or None."""
+    if at is None:
+        cursor.execute("SELECT MAX(snapshot_at) FROM inventory_snapshots WHERE snapshot_at <= NOW()")
+    else:
+        cursor.execute("SELECT MAX(snapshot_at) FROM inventory_snapshots WHERE snapshot_at <= %s", (at,))
+    return cursor.fetchone()[0]
+
+def ledger_stock(cursor, at=None):
+    """Ledger balance of every ingredient that existed at `at` (now if None):
+       nearest snapshot + signed transactions from the snapshot up to `at`."""
+    base = latest_snapshot_at(cursor, at)
+    until_sql, params = ("AND t.created_at < %s", [at]) if at else ("", [])
+    cursor.execute(f"""
+        SELECT i.id, i.name, i.unit, i.current_stock,
+               COALESCE(s.stock, 0) + COALESCE(SUM({LEDGER_SIGNED_QTY}), 0) AS stock
+        FROM ingredients i
+        LEFT JOIN inventory_snapshots s ON s.ingredient_id = i.id AND s.snapshot_at = %s
+        LEFT JOIN {ledger_table(base)} t ON t.ingredient_id = i.id
+             AND t.created_at >= COALESCE(s.snapshot_at, %s) {until_sql}
+        WHERE i.created_at <= COALESCE(%s, NOW())
+        GROUP BY i.id, i.name, i.unit, i.current_stock, s.stock
+        ORDER BY i.name
+    """, [base, WATERMARK_FLOOR] + params + [at])
+    return base, [dict_from_row(cursor, r) for r in cursor.fetchall()]
+
+def take_inventory_snapshot(cursor, at):
+    """Record every ingredient's ledger balance as of `at` in one INSERT ... SELECT,
+       rolling forward from the previous snapshot. Returns the rows written."""
+    base = latest_snapshot_at(cursor, at)
+    if base == at:
+        return 0
+    cursor.execute(f"""
+        INSERT INTO inventory_snapshots (snapshot_at, ingredient_id, stock)
+        SELECT %s, i.id, COALESCE(s.stock, 0) + COALESCE(SUM({LEDGER_SIGNED_QTY}), 0)
+        FROM ingredients i
+        LEFT JOIN inventory_snapshots s ON s.ingredient_id = i.id AND s.snapshot_at = %s
+        LEFT JOIN {ledger_table(base)} t ON t.ingredient_id = i.id
+             AND t.created_at >= COALESCE(s.snapshot_at, %s) AND t.created_at < %s
+        GROUP BY i.id, s.stock
+    """, (at, base, WATERMARK_FLOOR, at))
+    return cursor.rowcount
+
+def stock_drift(cursor):
+    """Ingredients whose current_stock disagrees with the ledger balance."""
+    _, rows = ledger_stock(cursor)
+    drift = []
+    for r in rows:
+        difference = round(float(r['current_stock']) - float(r['stock']), 3)
+        if abs(difference) >= 0.01:
+            drift.append({"id": r['id'], "name": r['name'], "unit": r['unit'],
+                          "current_stock": float(r['current_stock']), "ledger_stock": float(r['stock']),
+                          "drift": difference})
+    return drift
+
+@app.route('/api/inventory/stock-at', methods=['GET'])
+def get_stock_at():
+    """Stock of every ingredient at ?at=YYYY-MM-DD[THH:MM:SS] (as recorded by the ledger)."""
+    try:
+        at = parse_iso_datetime(request.args.get('at'))
+    except ValueError:
+        return jsonify({"success": False, "message": "at must be an ISO date or datetime"}), 400
+    if at is None:
+        return jsonify({"success": False, "message": "at is required"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        base, rows = ledger_stock(cursor, at)
+        stock = [{"id": r['id'], "name": r['name'], "unit": r['unit'], "stock": float(r['stock'])} for r in rows]
+        return jsonify({"success": True, "at": at.isoformat(),
+                        "snapshot_at": base.isoformat() if base else None, "stock": stock})
+    except Exception as e:
+        app.logger.exception("get_stock_at error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/api/inventory/snapshots', methods=['POST'])
+def create_inventory_snapshot():
+    """Snapshot the ledger as of midnight today (or ?at=...)."""
+    try:
+        at = parse_iso_datetime(request.args.get('at')) or day_range(datetime.now().date())[0]
+    except ValueError:
+        return jsonify({"success": False, "message": "at must be an ISO date or datetime"}), 400
+    if at > datetime.now():
+        # later transactions would be skipped by every replay based on this snapshot
+        return jsonify({"success": False, "message": "at must not be in the future"}), 400
+
+    cursor = mysql.connection.cursor()
+    try:
+        rows = take_inventory_snapshot(cursor, at)
+        mysql.connection.commit()
+        return jsonify({"success": True, "snapshot_at": at.isoformat(), "ingredients": rows})
+    except Exception as e:
+        mysql.connection.rollback()
+        app.logger.exception("create_inventory_snapshot error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.route('/api/inventory/reconcile', methods=['GET'])
+def reconcile_inventory():
+    """Compare ingredients.current_stock with the ledger balance."""
+    cursor = mysql.connection.cursor()
+    try:
+        drift = stock_drift(cursor)
+        return jsonify({"success": True, "in_sync": not drift, "drift": drift})
+    except Exception as e:
+        app.logger.exception("reconcile_inventory error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+@app.cli.command('inventory-snapshot')
+def inventory_snapshot_command():
+    """Snapshot stock as of today 00:00 (schedule daily): flask --app mainapp inventory-snapshot"""
+    at = day_range(datetime.now().date())[0]
+    cursor = mysql.connection.cursor()
+    try:
+        rows = take_inventory_snapshot(cursor, at)
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    print(f"Snapshot at {at.isoformat()}: {rows} ingredient(s)")
+
+@app.cli.command('inventory-reconcile')
+def inventory_reconcile_command():
+    """Report drift between the ledger and current_stock: flask --app mainapp inventory-reconcile"""
+    cursor = mysql.connection.cursor()
+    try:
+        drift = stock_drift(cursor)
+    finally:
+        cursor.close()
+    for d in drift:
+        print(f"{d['name']:30} current={d['current_stock']:>10} ledger={d['ledger_stock']:>10} drift={d['drift']:>+10}")
+    if drift:
+        raise SystemExit(f"{len(drift)} ingredient(s) out of sync with the ledger")
+    print("Stock matches the ledger")
+
 # -----------------------
 # Purchase Order Routes
 # -----------------------
 
 # Get all purchase orders
 @app.route('/api/purchase-orders', methods=['GET'])
+@conditional_listing('purchase_orders')
 def get_purchase_orders():
     cursor = mysql.connection.cursor()
     try:
@@ -1276,30 +3316,38 @@ def update_po_status(po_id):
             (new_status, po_id)
         )
         
-        # If status is 'received', update ingredient stock
+        # If status is 'received', update ingredient stock. received_at is claimed only
+        # once, so receiving the same PO again does not add its stock twice.
         if new_status == 'received':
-            cursor.execute("""
-                SELECT poi.ingredient_id, poi.quantity 
-                FROM purchase_order_items poi 
-                WHERE poi.po_id = %s
-            """, (po_id,))
-            items = cursor.fetchall()
-            
-            for ingredient_id, quantity in items:
+            cursor.execute(
+                "UPDATE purchase_orders SET received_at = NOW() WHERE id = %s AND received_at IS NULL",
+                (po_id,)
+            )
+            if cursor.rowcount == 1:
                 cursor.execute("""
-                    UPDATE ingredients 
-                    SET current_stock = current_stock + %s 
-                    WHERE id = %s
-                """, (quantity, ingredient_id))
-                
-                # Record inventory transaction - FIXED: Use shorter transaction type
+                    UPDATE ingredients i
+                    JOIN (
+                        SELECT ingredient_id, SUM(quantity) AS qty
+                        FROM purchase_order_items
+                        WHERE po_id = %s
+                        GROUP BY ingredient_id
+                    ) r ON r.ingredient_id = i.id
+                    SET i.current_stock = i.current_stock + r.qty
+                """, (po_id,))
+
+                # Record inventory transactions - FIXED: Use shorter transaction type
                 cursor.execute("""
-                    INSERT INTO inventory_transactions 
+                    INSERT INTO inventory_transactions
                     (ingredient_id, transaction_type, quantity, note, created_by)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (ingredient_id, 'purchase', quantity, f'PO #{po_id} received', session.get('user_id', 1)))
+                    SELECT ingredient_id, 'purchase', SUM(quantity), %s, %s
+                    FROM purchase_order_items
+                    WHERE po_id = %s AND ingredient_id IS NOT NULL
+                    GROUP BY ingredient_id
+                """, (f'PO #{po_id} received', session.get('user_id', 1), po_id))
         
+        bump_resource_versions(cursor, 'purchase_orders', 'ingredients')
         mysql.connection.commit()
+        response_cache.invalidate('purchase_orders', 'ingredients')
         return jsonify({"success": True, "message": f"PO status updated to {new_status}"})
         
     except Exception as e:
@@ -1314,6 +3362,7 @@ def update_po_status(po_id):
 
 # Get expenses with date range filtering
 @app.route('/api/expenses', methods=['GET'])
+@coalesce_requests
 def get_expenses():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
@@ -1368,20 +3417,22 @@ def get_expenses():
 # ---------------------------------
 
 @app.route('/api/analytics/monthly-sales')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('orders',))
 def analytics_monthly_sales():
     """Get monthly sales data for the current year"""
+    today = datetime.now().date()
     cursor = mysql.connection.cursor()
     try:
         cursor.execute("""
             SELECT 
-                DATE_FORMAT(created_at, '%Y-%m') as month,
-                SUM(final_total) as total_sales,
-                COUNT(*) as order_count
-            FROM orders 
-            WHERE YEAR(created_at) = YEAR(CURDATE())
-            GROUP BY DATE_FORMAT(created_at, '%Y-%m')
+                DATE_FORMAT(day, '%%Y-%%m') as month,
+                SUM(net) as total_sales,
+                SUM(orders_count) as order_count
+            FROM sales_daily_rollup 
+            WHERE day >= %s AND day < %s
+            GROUP BY DATE_FORMAT(day, '%%Y-%%m')
             ORDER BY month
-        """)
+        """, month_range(today.replace(month=1), today.replace(month=12)))
         rows = cursor.fetchall()
         monthly_data = [dict_from_row(cursor, row) for row in rows]
         
@@ -1409,6 +3460,7 @@ def analytics_monthly_sales():
         cursor.close()
 
 @app.route('/api/analytics/ingredient-stock')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('ingredients',))
 def analytics_ingredient_stock():
     """Get current ingredient stock levels"""
     cursor = mysql.connection.cursor()
@@ -1440,6 +3492,7 @@ def analytics_ingredient_stock():
         cursor.close()
 
 @app.route('/api/analytics/expense-distribution')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('expenses',))
 def analytics_expense_distribution():
     """Get expense distribution by category"""
     cursor = mysql.connection.cursor()
@@ -1473,6 +3526,7 @@ def analytics_expense_distribution():
         cursor.close()
 
 @app.route('/api/analytics/sales-vs-expenses')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('orders', 'expenses'))
 def analytics_sales_vs_expenses():
     """Compare sales vs expenses for the last 6 months"""
     cursor = mysql.connection.cursor()
@@ -1480,11 +3534,11 @@ def analytics_sales_vs_expenses():
         # Get sales data
         cursor.execute("""
             SELECT 
-                DATE_FORMAT(created_at, '%Y-%m') as month,
-                SUM(final_total) as sales
-            FROM orders 
-            WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL 6 MONTH)
-            GROUP BY DATE_FORMAT(created_at, '%Y-%m')
+                DATE_FORMAT(day, '%Y-%m') as month,
+                SUM(net) as sales
+            FROM sales_daily_rollup 
+            WHERE day >= DATE_SUB(CURDATE(), INTERVAL 6 MONTH)
+            GROUP BY DATE_FORMAT(day, '%Y-%m')
             ORDER BY month
         """)
         sales_rows = cursor.fetchall()
@@ -1530,20 +3584,20 @@ def analytics_sales_vs_expenses():
         cursor.close()
 
 @app.route('/api/analytics/top-selling-items')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('orders',))
 def analytics_top_selling_items():
     """Get top selling menu items"""
     cursor = mysql.connection.cursor()
     try:
         cursor.execute("""
             SELECT 
-                oi.item_name,
-                SUM(oi.qty) as total_quantity,
-                SUM(oi.total_price) as total_revenue,
-                COUNT(DISTINCT oi.order_id) as order_count
-            FROM order_items oi
-            JOIN orders o ON o.id = oi.order_id
-            WHERE o.created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
-            GROUP BY oi.item_name
+                item_name,
+                SUM(qty) as total_quantity,
+                SUM(revenue) as total_revenue,
+                SUM(order_count) as order_count
+            FROM item_daily_rollup
+            WHERE day >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+            GROUP BY item_name
             ORDER BY total_quantity DESC
             LIMIT 10
         """)
@@ -1561,6 +3615,7 @@ def analytics_top_selling_items():
         cursor.close()
 
 @app.route('/api/analytics/order-metrics')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('orders',))
 def analytics_order_metrics():
     """Get key order metrics"""
     cursor = mysql.connection.cursor()
@@ -1568,42 +3623,42 @@ def analytics_order_metrics():
         # Today's metrics
         cursor.execute("""
             SELECT 
-                COUNT(*) as today_orders,
-                COALESCE(SUM(final_total), 0) as today_sales,
-                AVG(final_total) as today_avg_order_value
-            FROM orders 
-            WHERE DATE(created_at) = CURDATE()
+                COALESCE(SUM(orders_count), 0) as today_orders,
+                COALESCE(SUM(net), 0) as today_sales,
+                SUM(net) / NULLIF(SUM(orders_count), 0) as today_avg_order_value
+            FROM sales_daily_rollup 
+            WHERE day = CURDATE()
         """)
         today = cursor.fetchone()
         
         # Weekly metrics
         cursor.execute("""
             SELECT 
-                COUNT(*) as weekly_orders,
-                COALESCE(SUM(final_total), 0) as weekly_sales
-            FROM orders 
-            WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+                COALESCE(SUM(orders_count), 0) as weekly_orders,
+                COALESCE(SUM(net), 0) as weekly_sales
+            FROM sales_daily_rollup 
+            WHERE day >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
         """)
         weekly = cursor.fetchone()
         
         # Monthly metrics
         cursor.execute("""
             SELECT 
-                COUNT(*) as monthly_orders,
-                COALESCE(SUM(final_total), 0) as monthly_sales
-            FROM orders 
-            WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+                COALESCE(SUM(orders_count), 0) as monthly_orders,
+                COALESCE(SUM(net), 0) as monthly_sales
+            FROM sales_daily_rollup 
+            WHERE day >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
         """)
         monthly = cursor.fetchone()
         
         # Popular hours
         cursor.execute("""
             SELECT 
-                HOUR(created_at) as hour,
-                COUNT(*) as order_count
-            FROM orders 
-            WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
-            GROUP BY HOUR(created_at)
+                HOUR(hour_start) as hour,
+                SUM(orders_count) as order_count
+            FROM sales_hourly_rollup 
+            WHERE hour_start >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+            GROUP BY HOUR(hour_start)
             ORDER BY order_count DESC
             LIMIT 5
         """)
@@ -1612,16 +3667,16 @@ def analytics_order_metrics():
         return jsonify({
             "success": True,
             "today": {
-                "orders": today[0] or 0,
+                "orders": int(today[0] or 0),
                 "sales": float(today[1] or 0),
                 "avg_order_value": float(today[2] or 0)
             },
             "weekly": {
-                "orders": weekly[0] or 0,
+                "orders": int(weekly[0] or 0),
                 "sales": float(weekly[1] or 0)
             },
             "monthly": {
-                "orders": monthly[0] or 0,
+                "orders": int(monthly[0] or 0),
                 "sales": float(monthly[1] or 0)
             },
             "popular_hours": [f"{row[0]}:00" for row in popular_hours]
@@ -1632,6 +3687,131 @@ def analytics_order_metrics():
     finally:
         cursor.close()
 
+def last_months(today, count):
+    """'YYYY-MM' keys of the `count` calendar months ending with today's month, oldest first."""
+    index = today.year * 12 + today.month - 1
+    return [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(index - count + 1, index + 1)]
+
+@app.route('/api/analytics/dashboard')
+@response_cache.cached(ANALYTICS_CACHE_TTL, ('orders', 'ingredients', 'expenses'))
+def analytics_dashboard():
+    """Everything analytics.html shows, in the shapes of the individual analytics
+       endpoints, from one conditional-aggregation query per table (5 in total)."""
+    today = datetime.now().date()
+    week_start, month_start = today - timedelta(days=7), today - timedelta(days=30)
+    compare_months = last_months(today, 6)
+    compare_start = datetime.strptime(compare_months[0], '%Y-%m').date()
+    year_start, year_end = month_range(today.replace(month=1), today.replace(month=12))
+
+    cursor = mysql.connection.cursor()
+    try:
+        # Sales per month, plus today / 7-day / 30-day totals folded into the same scan
+        cursor.execute("""
+            SELECT DATE_FORMAT(day, '%%Y-%%m') AS month,
+                   SUM(net), SUM(orders_count),
+                   SUM(CASE WHEN day = %s THEN orders_count ELSE 0 END),
+                   SUM(CASE WHEN day = %s THEN net ELSE 0 END),
+                   SUM(CASE WHEN day >= %s THEN orders_count ELSE 0 END),
+                   SUM(CASE WHEN day >= %s THEN net ELSE 0 END),
+                   SUM(CASE WHEN day >= %s THEN orders_count ELSE 0 END),
+                   SUM(CASE WHEN day >= %s THEN net ELSE 0 END)
+            FROM sales_daily_rollup
+            WHERE day >= %s AND day < %s
+            GROUP BY DATE_FORMAT(day, '%%Y-%%m')
+        """, (today, today, week_start, week_start, month_start, month_start,
+              min(year_start.date(), compare_start, month_start), year_end))
+        sales_by_month = {}
+        totals = [0.0] * 6
+        for row in cursor.fetchall():
+            sales_by_month[row[0]] = (float(row[1] or 0), int(row[2] or 0))
+            totals = [t + float(v or 0) for t, v in zip(totals, row[3:])]
+        today_orders, today_sales, weekly_orders, weekly_sales, monthly_orders, monthly_sales = totals
+
+        # Expenses per month and type; the 30-day share feeds the distribution chart
+        cursor.execute("""
+            SELECT DATE_FORMAT(expense_date, '%%Y-%%m') AS month, expense_type, SUM(amount),
+                   SUM(CASE WHEN expense_date >= %s THEN amount ELSE 0 END)
+            FROM expenses
+            WHERE expense_date >= %s
+            GROUP BY DATE_FORMAT(expense_date, '%%Y-%%m'), expense_type
+        """, (month_start, min(compare_start, month_start)))
+        expenses_by_month = collections.Counter()
+        expenses_by_type = collections.Counter()
+        for month, expense_type, amount, recent in cursor.fetchall():
+            expenses_by_month[month] += float(amount or 0)
+            expenses_by_type[expense_type] += float(recent or 0)
+
+        cursor.execute("""
+            SELECT HOUR(hour_start) AS hour, SUM(orders_count) AS order_count
+            FROM sales_hourly_rollup
+            WHERE hour_start >= %s
+            GROUP BY HOUR(hour_start)
+            ORDER BY order_count DESC
+            LIMIT 5
+        """, (month_start,))
+        popular_hours = [f"{row[0]}:00" for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT item_name, SUM(qty) AS total_quantity, SUM(revenue) AS total_revenue,
+                   SUM(order_count) AS order_count
+            FROM item_daily_rollup
+            WHERE day >= %s
+            GROUP BY item_name
+            ORDER BY total_quantity DESC
+            LIMIT 10
+        """, (month_start,))
+        top_items = [dict_from_row(cursor, row) for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT name, current_stock, unit, reorder_level
+            FROM ingredients
+            ORDER BY current_stock ASC
+            LIMIT 10
+        """)
+        ingredients = [dict_from_row(cursor, row) for row in cursor.fetchall()]
+    except Exception as e:
+        app.logger.exception("analytics_dashboard error")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+    year_months = [f"{today.year:04d}-{m:02d}" for m in range(1, 13)]
+    distribution = [(t, a) for t, a in expenses_by_type.most_common() if a > 0]
+    return jsonify({
+        "success": True,
+        "monthly_sales": {
+            "labels": ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+            "sales_data": [sales_by_month.get(m, (0, 0))[0] for m in year_months],
+            "order_counts": [sales_by_month.get(m, (0, 0))[1] for m in year_months]
+        },
+        "ingredient_stock": {
+            "labels": [ing['name'] for ing in ingredients],
+            "stock_data": [float(ing['current_stock']) for ing in ingredients],
+            "reorder_levels": [float(ing['reorder_level']) for ing in ingredients],
+            "unit": ingredients[0]['unit'] if ingredients else 'units'
+        },
+        "expense_distribution": {
+            "labels": [t for t, _ in distribution],
+            "amounts": [a for _, a in distribution]
+        },
+        "sales_vs_expenses": {
+            "labels": [datetime.strptime(m, '%Y-%m').strftime('%b') for m in compare_months],
+            "sales": [sales_by_month.get(m, (0, 0))[0] for m in compare_months],
+            "expenses": [expenses_by_month.get(m, 0) for m in compare_months]
+        },
+        "order_metrics": {
+            "today": {
+                "orders": int(today_orders),
+                "sales": today_sales,
+                "avg_order_value": today_sales / today_orders if today_orders else 0.0
+            },
+            "weekly": {"orders": int(weekly_orders), "sales": weekly_sales},
+            "monthly": {"orders": int(monthly_orders), "sales": monthly_sales},
+            "popular_hours": popular_hours
+        },
+        "top_items": top_items
+    })
+
 # -----------------------
 # Enhanced Ingredient Management Routes
 # -----------------------
@@ -1672,7 +3852,9 @@ def add_ingredient():
                 (ingredient_id, 'initial', current_stock, 'Initial stock', session.get('user_id', 1))
             )
         
+        bump_resource_versions(cursor, 'ingredients')
         mysql.connection.commit()
+        response_cache.invalidate('ingredients')
         return jsonify({"success": True, "message": "Ingredient added successfully", "ingredient_id": ingredient_id})
     except Exception as e:
         mysql.connection.rollback()
@@ -1687,7 +3869,7 @@ def restock_ingredient(ingredient_id):
     if not data:
         return jsonify({"success": False, "message": "Invalid JSON"}), 400
     
-    quantity = float(data.get('quantity', 0))
+    quantity = round(float(data.get('quantity', 0)), STOCK_DECIMALS)
     note = data.get('note', 'Manual restock')
     
     if quantity <= 0:
@@ -1695,21 +3877,17 @@ def restock_ingredient(ingredient_id):
     
     cursor = mysql.connection.cursor()
     try:
-        # Check if ingredient exists
-        cursor.execute("SELECT current_stock, name FROM ingredients WHERE id = %s", (ingredient_id,))
-        result = cursor.fetchone()
-        if not result:
-            return jsonify({"success": False, "message": "Ingredient not found"}), 404
-        
-        current_stock = float(result[0])
-        ingredient_name = result[1]
-        new_stock = current_stock + quantity
-        
-        # Update stock
+        # Add in place so concurrent restocks/deductions are never lost
         cursor.execute(
-            "UPDATE ingredients SET current_stock = %s WHERE id = %s",
-            (new_stock, ingredient_id)
+            "UPDATE ingredients SET current_stock = current_stock + %s WHERE id = %s",
+            (quantity, ingredient_id)
         )
+        if cursor.rowcount == 0:
+            return jsonify({"success": False, "message": "Ingredient not found"}), 404
+
+        cursor.execute("SELECT current_stock, name FROM ingredients WHERE id = %s", (ingredient_id,))
+        current_stock, ingredient_name = cursor.fetchone()
+        new_stock = float(current_stock)
         
         # Record transaction - FIXED: Use shorter transaction type
         cursor.execute(
@@ -1717,7 +3895,9 @@ def restock_ingredient(ingredient_id):
             (ingredient_id, 'restock', quantity, note, session.get('user_id', 1))
         )
         
+        bump_resource_versions(cursor, 'ingredients')
         mysql.connection.commit()
+        response_cache.invalidate('ingredients')
         return jsonify({
             "success": True, 
             "new_stock": new_stock,
@@ -1768,7 +3948,9 @@ def update_ingredient(ingredient_id):
         query = f"UPDATE ingredients SET {', '.join(update_fields)} WHERE id = %s"
         
         cursor.execute(query, update_values)
+        bump_resource_versions(cursor, 'ingredients')
         mysql.connection.commit()
+        response_cache.invalidate('ingredients')
         
         return jsonify({"success": True, "message": "Ingredient updated successfully"})
         
@@ -1840,7 +4022,9 @@ def delete_ingredient(ingredient_id):
         # 3. Finally delete the ingredient itself
         cursor.execute("DELETE FROM ingredients WHERE id = %s", (ingredient_id,))
         
+        bump_resource_versions(cursor, 'ingredients')
         mysql.connection.commit()
+        response_cache.invalidate('ingredients')
         
         return jsonify({
             'success': True, 
@@ -1857,12 +4041,28 @@ def delete_ingredient(ingredient_id):
 # Initialize database tables
 # Replace the last few lines of your mainapp.py with this:
 
+@app.route('/api/db-pool/metrics')
+def db_pool_metrics():
+    """Connection pool occupancy and borrow wait-time percentiles for this worker."""
+    return jsonify({"success": True, "pid": os.getpid(), "pool": mysql.pool.metrics()})
+
+@app.route('/api/cache/metrics')
+def cache_metrics():
+    """Response cache hits / misses and request coalescing counts for this worker."""
+    return jsonify({
+        "success": True,
+        "pid": os.getpid(),
+        "response_cache": dict(response_cache.stats),
+        "single_flight": request_flight.metrics()
+    })
+
 # Initialize database tables
 @app.route('/init-db')
 def init_db():
     """Initialize database tables (run this once)"""
     try:
         init_database()
+        run_migrations()
         create_default_owner()
         return "Database initialized successfully"
     except Exception as e:
@@ -0,0 +1,74 @@
+-- Secondary indexes for the hot queries and foreign keys between the core tables.
+-- Child rows pointing at a missing parent would block the constraints. They are first
+-- copied into <table>_orphans quarantine tables (same columns) and only then removed (for
+-- employees: user_id cleared), so nothing is lost; check those tables after migrating.
+-- Rows with a NULL key satisfy the constraints and are left alone.
+
+-- orders: kitchen queue, keyset pagination, change feed and date-range reports
+ALTER TABLE orders
+    ADD INDEX idx_orders_status_created (current_status, created_at, id),
+    ADD INDEX idx_orders_created (created_at, id),
+    ADD INDEX idx_orders_updated (updated_at, id);
+
+-- order_items: item hydration (order_id IN (...)) and per-item reports
+CREATE TABLE order_items_orphans LIKE order_items;
+INSERT IGNORE INTO order_items_orphans
+    SELECT oi.* FROM order_items oi LEFT JOIN orders o ON o.id = oi.order_id
+    WHERE oi.order_id IS NOT NULL AND o.id IS NULL;
+DELETE oi FROM order_items oi LEFT JOIN orders o ON o.id = oi.order_id
+    WHERE oi.order_id IS NOT NULL AND o.id IS NULL;
+ALTER TABLE order_items
+    ADD INDEX idx_order_items_order (order_id),
+    ADD CONSTRAINT fk_order_items_order FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE;
+
+-- ingredients: low-stock checks compare current_stock with reorder_level
+ALTER TABLE ingredients
+    ADD INDEX idx_ingredients_stock (current_stock, reorder_level);
+
+-- inventory_transactions: per-ingredient history and usage over time
+CREATE TABLE inventory_transactions_orphans LIKE inventory_transactions;
+INSERT IGNORE INTO inventory_transactions_orphans
+    SELECT t.* FROM inventory_transactions t LEFT JOIN ingredients i ON i.id = t.ingredient_id
+    WHERE t.ingredient_id IS NOT NULL AND i.id IS NULL;
+DELETE t FROM inventory_transactions t LEFT JOIN ingredients i ON i.id = t.ingredient_id
+    WHERE t.ingredient_id IS NOT NULL AND i.id IS NULL;
+ALTER TABLE inventory_transactions
+    ADD INDEX idx_inv_txn_ingredient_created (ingredient_id, created_at),
+    ADD INDEX idx_inv_txn_type_created (transaction_type, created_at),
+    ADD CONSTRAINT fk_inv_txn_ingredient FOREIGN KEY (ingredient_id) REFERENCES ingredients (id);
+
+-- purchase orders and their lines
+ALTER TABLE purchase_orders
+    ADD INDEX idx_purchase_orders_status (status),
+    ADD INDEX idx_purchase_orders_created (created_at);
+
+CREATE TABLE purchase_order_items_orphans LIKE purchase_order_items;
+INSERT IGNORE INTO purchase_order_items_orphans
+    SELECT poi.* FROM purchase_order_items poi
+    LEFT JOIN purchase_orders po ON po.id = poi.po_id
+    LEFT JOIN ingredients i ON i.id = poi.ingredient_id
+    WHERE (poi.po_id IS NOT NULL AND po.id IS NULL) OR (poi.ingredient_id IS NOT NULL AND i.id IS NULL);
+DELETE poi FROM purchase_order_items poi
+    LEFT JOIN purchase_orders po ON po.id = poi.po_id
+    LEFT JOIN ingredients i ON i.id = poi.ingredient_id
+    WHERE (poi.po_id IS NOT NULL AND po.id IS NULL) OR (poi.ingredient_id IS NOT NULL AND i.id IS NULL);
+ALTER TABLE purchase_order_items
+    ADD INDEX idx_po_items_po (po_id),
+    ADD INDEX idx_po_items_ingredient (ingredient_id),
+    ADD CONSTRAINT fk_po_items_po FOREIGN KEY (po_id) REFERENCES purchase_orders (id) ON DELETE CASCADE,
+    ADD CONSTRAINT fk_po_items_ingredient FOREIGN KEY (ingredient_id) REFERENCES ingredients (id);
+
+-- expenses: date-range reports and per-type distribution
+ALTER TABLE expenses
+    ADD INDEX idx_expenses_date (expense_date),
+    ADD INDEX idx_expenses_type_date (expense_type, expense_date);
+
+-- employees: listing is ordered by role, name; user accounts may be removed separately
+CREATE TABLE employees_orphans LIKE employees;
+INSERT IGNORE INTO employees_orphans
+    SELECT e.* FROM employees e LEFT JOIN users u ON u.id = e.user_id
+    WHERE e.user_id IS NOT NULL AND u.id IS NULL;
+UPDATE employees e LEFT JOIN users u ON u.id = e.user_id SET e.user_id = NULL WHERE e.user_id IS NOT NULL AND u.id IS NULL;
+ALTER TABLE employees
+    ADD INDEX idx_employees_role_name (role, name),
+    ADD CONSTRAINT fk_employees_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL;
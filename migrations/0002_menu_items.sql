@@ -0,0 +1,95 @@
+-- Menu catalog, previously hard-coded in menu1.html / manager_menu.html.
+-- create_order prices cart lines from this table.
+
+CREATE TABLE IF NOT EXISTS menu_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    price DECIMAL(10,2) NOT NULL,
+    description TEXT,
+    image VARCHAR(255),
+    sort_order INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_menu_items_name (name),
+    INDEX idx_menu_items_category (category, sort_order)
+);
+
+INSERT IGNORE INTO menu_items (name, category, price, description, image, sort_order) VALUES
+    ('Idli Sambar', 'Tiffins', 60.00, 'Soft idlis served with hot sambar and chutney.', '/static/images/idlisambar.jpeg', 1),
+    ('Masala Dosa', 'Tiffins', 90.00, 'Crispy dosa stuffed with spiced potato masala.', '/static/images/masaladosa.jpeg', 2),
+    ('Uggani Bajji', 'Tiffins', 80.00, 'Fluffy puris served with delicious aloo curry.', '/static/images/ugganibajji.jpeg', 3),
+    ('Vada Sambar', 'Tiffins', 70.00, 'Crispy medu vada dipped in flavorful sambar.', '/static/images/vadasambar.jpeg', 4),
+    ('Upma', 'Tiffins', 55.00, 'Soft roasted semolina cooked with veggies.', '/static/images/upma.jpeg', 5),
+    ('Pongal', 'Tiffins', 70.00, 'Traditional South Indian rice-lentil dish.', '/static/images/pongal.jpeg', 6),
+    ('Onion Uttapam', 'Tiffins', 85.00, 'Thick uttapam topped with onions & spices.', '/static/images/onionuttapam.jpeg', 7),
+    ('Ghee Dosa', 'Tiffins', 110.00, 'Crispy dosa fried with aromatic ghee.', '/static/images/gheedosa.jpeg', 8),
+    ('Rava Dosa', 'Tiffins', 100.00, 'Thin and crispy semolina dosa.', '/static/images/ravadosa.jpeg', 9),
+    ('Poori Chole', 'Tiffins', 90.00, 'Deep fried pooris with spicy chole.', '/static/images/pootichole.jpeg', 10),
+    ('Paneer Tikka', 'Starters', 220.00, 'Soft cottage cheese cubes marinated in spices and grilled.', '/static/images/paneertikka.jpeg', 11),
+    ('Veg Manchurian', 'Starters', 200.00, 'Crispy veggie balls tossed in spicy Indo-Chinese sauce.', '/static/images/vegmanchurian.jpeg', 12),
+    ('Spring Rolls', 'Starters', 180.00, 'Crispy rolls filled with veggies and noodles.', '/static/images/springrolls.jpeg', 13),
+    ('Hara Bhara Kabab', 'Starters', 190.00, 'Nutritious patties made with spinach and peas.', '/static/images/harabarakabab.jpeg', 14),
+    ('Veg Crispy', 'Starters', 210.00, 'Crispy fried vegetables tossed in tangy sauce.', '/static/images/vegcrispy.jpeg', 15),
+    ('Corn Cheese Balls', 'Starters', 170.00, 'Crunchy balls stuffed with sweet corn and cheese.', '/static/images/cheeseballs.jpeg', 16),
+    ('Paneer 65', 'Starters', 200.00, 'South-Indian style spicy paneer starter.', '/static/images/paneer65.jpeg', 17),
+    ('Chilli Mushroom', 'Starters', 190.00, 'Stir-fried mushrooms tossed in chilli sauce.', '/static/images/chillimushroom.jpeg', 18),
+    ('Stuffed Aloo Tikki', 'Starters', 160.00, 'Potato patties stuffed with spicy filling.', '/static/images/stuffedalootikki.jpeg', 19),
+    ('Chicken Lollipop', 'Starters', 250.00, 'Crispy chicken wings coated in tangy sauce.', '/static/images/chickenlollypop.jfif', 20),
+    ('Chicken 65', 'Starters', 260.00, 'Spicy deep-fried chicken bites.', '/static/images/chicken65.jpeg', 21),
+    ('Fish Fingers', 'Starters', 240.00, 'Golden fried fish strips.', '/static/images/fishfingers.jpeg', 22),
+    ('Chilli Chicken', 'Starters', 260.00, 'Chinese style spicy chicken starter.', '/static/images/chillichicken.jpeg', 23),
+    ('Prawn Fry', 'Starters', 320.00, 'Fried prawns marinated in coastal spices.', '/static/images/prawnfry.jpeg', 24),
+    ('Chicken Tikka', 'Starters', 280.00, 'Chicken cubes grilled in tandoori spices.', '/static/images/chickentikka.jpeg', 25),
+    ('Mutton Seekh Kabab', 'Starters', 350.00, 'Minced mutton kebabs grilled on skewers.', '/static/images/muttonseekhkabab.jpeg', 26),
+    ('Chicken Crispy', 'Starters', 250.00, 'Crisp chicken tossed in spicy sauce.', '/static/images/chickencrispy.jpeg', 27),
+    ('Fish Tikka', 'Starters', 300.00, 'Fish cubes grilled in tandoor.', '/static/images/fishtikka.jpeg', 28),
+    ('Chicken Popcorn', 'Starters', 220.00, 'Crispy bite-sized chicken chunks.', '/static/images/chickenpopcorn.jpeg', 29),
+    ('Chicken Pakora', 'Starters', 230.00, 'Crispy deep-fried chicken fritters.', '/static/images/chickenpakora.jpeg', 30),
+    ('Egg Pakora', 'Starters', 150.00, 'Boiled eggs fried in chickpea batter.', '/static/images/eggpakora.jpeg', 31),
+    ('Paneer Butter Masala', 'Main Course', 300.00, 'Creamy rich paneer curry.', '/static/images/paneerbuttermasala.jpeg', 32),
+    ('Veg Biryani', 'Main Course', 280.00, 'Fragrant rice slow cooked with veggies.', '/static/images/vegbiryani.jpeg', 33),
+    ('Dal Tadka', 'Main Course', 200.00, 'Yellow dal tempered with garlic.', '/static/images/daltadka.jpeg', 34),
+    ('Palak Paneer', 'Main Course', 280.00, 'Spinach gravy with paneer cubes.', '/static/images/palakpaneer.jpeg', 35),
+    ('Veg Fried Rice', 'Main Course', 230.00, 'Chinese style rice loaded with veggies.', '/static/images/vegfriedrice.jpeg', 36),
+    ('Veg Pulao', 'Main Course', 240.00, 'Light, fragrant rice with veggies.', '/static/images/vegpulao.jpeg', 37),
+    ('Mix Veg Curry', 'Main Course', 260.00, 'Mixed seasonal vegetables cooked in gravy.', '/static/images/mixvegcurry.jpeg', 38),
+    ('Kaju Curry', 'Main Course', 340.00, 'Rich curry made with cashews.', '/static/images/kajucurry.jpeg', 39),
+    ('Matar Paneer', 'Main Course', 280.00, 'Peas and paneer cooked in tomato gravy.', '/static/images/matarpaneer.jpeg', 40),
+    ('Aloo Gobi', 'Main Course', 220.00, 'Cauliflower and potato curry.', '/static/images/aloogobi.jpeg', 41),
+    ('Mushroom Masala', 'Main Course', 270.00, 'Rich curry with mushrooms.', '/static/images/mushroommasala.jpeg', 42),
+    ('Butter Chicken', 'Main Course', 320.00, 'Creamy tomato gravy with tender chicken.', '/static/images/butterchicken.jpeg', 43),
+    ('Chicken Fried Rice', 'Main Course', 270.00, 'Chinese style chicken rice.', '/static/images/chickenfriedrice.jpeg', 44),
+    ('Mutton Rogan Josh', 'Main Course', 400.00, 'Authentic Kashmiri lamb curry.', '/static/images/muttonroaganjosh.jpeg', 45),
+    ('Egg Curry', 'Main Course', 220.00, 'Boiled eggs simmered in onion-tomato gravy.', '/static/images/eggcurry.jpeg', 46),
+    ('Chicken Biryani', 'Main Course', 320.00, 'Slow cooked layered biryani.', '/static/images/chickenbiryani.jpeg', 47),
+    ('Fish Curry', 'Main Course', 350.00, 'Traditional fish curry with spices.', '/static/images/fishcurry.jpeg', 48),
+    ('Chicken Curry', 'Main Course', 300.00, 'Classic Indian style chicken gravy.', '/static/images/chickencurry.jpeg', 49),
+    ('Mutton Biryani', 'Main Course', 420.00, 'Rich aromatic biryani with mutton.', '/static/images/muttonbiryani.jpeg', 50),
+    ('Egg Biryani', 'Main Course', 120.00, 'Slow cooked layered egg biryani.', '/static/images/eggbiryani.jpeg', 51),
+    ('Butter naan', 'Main Course', 25.00, 'A soft Indian flatbread that is generously brushed with melted butter or ghee after cooking', '/static/images/butternaan.jpeg', 52),
+    ('Aloo Paratha', 'Main Course', 30.00, 'A popular Indian flatbread stuffed with a spiced mashed potato filling.', '/static/images/alooparatha.jpeg', 53),
+    ('Prawn Curry', 'Main Course', 360.00, 'Prawns cooked in coastal masala.', '/static/images/prawncurry.jpeg', 54),
+    ('Chicken Keema Fry', 'Main Course', 350.00, 'Minced chicken cooked with spices.', '/static/images/chickenkeemafry.jpeg', 55),
+    ('Mutton Keema Fry', 'Main Course', 360.00, 'Dry minced mutton fry.', '/static/images/muttonkeemacurry.jpeg', 56),
+    ('Gulab Jamun', 'Desserts', 120.00, 'Soft dumplings soaked in sugar syrup.', '/static/images/gulabjamun.jpeg', 57),
+    ('Rasmalai', 'Desserts', 160.00, 'Chenna patties in sweetened milk.', '/static/images/rasmalai.jpeg', 58),
+    ('Fruit Salad', 'Desserts', 130.00, 'Fresh mixed fruits.', '/static/images/fruitsalad.jpeg', 59),
+    ('Falooda', 'Desserts', 160.00, 'Layered dessert with ice cream.', '/static/images/falooda.jpeg', 60),
+    ('Mango Pudding', 'Desserts', 130.00, 'Soft pudding made with mango.', '/static/images/mangopudding.jpeg', 61),
+    ('Kaju Katli', 'Desserts', 180.00, 'Cashew based sweet.', '/static/images/kajukatli.jpeg', 62),
+    ('Jalebi', 'Desserts', 120.00, 'Crispy syrup coated jalebi.', '/static/images/jalebi.jpeg', 63),
+    ('Basundi', 'Desserts', 150.00, 'Sweet thickened milk.', '/static/images/basundi.jpeg', 64),
+    ('Shrikhand', 'Desserts', 140.00, 'Sweet hung curd dessert.', '/static/images/shrikhand.jpeg', 65),
+    ('Custard', 'Desserts', 110.00, 'Classic vanilla custard with fruits.', '/static/images/custard.jpeg', 66),
+    ('Lassi', 'Beverages', 90.00, 'Refreshing yogurt drink.', '/static/images/lassi.jpeg', 67),
+    ('Cold Coffee', 'Beverages', 130.00, 'Chilled coffee blended with milk.', '/static/images/coldcoffee.jpeg', 68),
+    ('Mango Shake', 'Beverages', 140.00, 'Fresh mango milkshake.', '/static/images/mangoshake.jpeg', 69),
+    ('Hot Chocolate', 'Beverages', 150.00, 'Creamy hot chocolate.', '/static/images/hotchocolate.jpeg', 70),
+    ('Masala Chai', 'Beverages', 60.00, 'Spiced Indian tea.', '/static/images/masalachai.jpeg', 71),
+    ('Fresh Lime Soda', 'Beverages', 100.00, 'Sweet & salty lime soda.', '/static/images/freshlimesoda.jpeg', 72),
+    ('Badam Milk', 'Beverages', 130.00, 'Almond flavoured milk.', '/static/images/badammilk.jpeg', 73),
+    ('Strawberry Shake', 'Beverages', 140.00, 'Creamy strawberry shake.', '/static/images/strawberryshake.jpeg', 74),
+    ('Orange Juice', 'Beverages', 110.00, 'Fresh orange juice.', '/static/images/orangejuice.jpeg', 75),
+    ('Watermelon Juice', 'Beverages', 100.00, 'Freshly crushed watermelon.', '/static/images/watermelonjuice.jpeg', 76),
+    ('Cappuccino', 'Beverages', 150.00, 'Frothy Italian coffee.', '/static/images/cappuccino.jpeg', 77);
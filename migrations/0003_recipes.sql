@@ -0,0 +1,16 @@
+-- Recipes (bill of materials): ingredient quantities used by one portion of a menu item.
+-- Stock is deducted from these when an order moves to "preparing".
+
+CREATE TABLE IF NOT EXISTS recipes (
+    menu_item_id INT NOT NULL,
+    ingredient_id INT NOT NULL,
+    quantity DECIMAL(10,3) NOT NULL,
+    PRIMARY KEY (menu_item_id, ingredient_id),
+    INDEX idx_recipes_ingredient (ingredient_id),
+    CONSTRAINT fk_recipes_menu_item FOREIGN KEY (menu_item_id) REFERENCES menu_items(id) ON DELETE CASCADE,
+    CONSTRAINT fk_recipes_ingredient FOREIGN KEY (ingredient_id) REFERENCES ingredients(id) ON DELETE CASCADE
+);
+
+-- Set once an order's ingredients have been deducted, so moving it back and forth
+-- through "preparing" never deducts twice.
+ALTER TABLE orders ADD COLUMN stock_deducted_at DATETIME NULL;
@@ -0,0 +1,6 @@
+-- Marks when a purchase order's stock was received; set exactly once so that
+-- re-marking a PO as received never adds its quantities twice.
+
+ALTER TABLE purchase_orders ADD COLUMN received_at DATETIME NULL;
+
+UPDATE purchase_orders SET received_at = updated_at WHERE status = 'received' AND received_at IS NULL;
@@ -0,0 +1,8 @@
+-- Source of purchase order numbers: each PO takes the next AUTO_INCREMENT id, so
+-- concurrent generation can never produce the same po_number.
+
+CREATE TABLE IF NOT EXISTS po_number_seq (
+    id INT AUTO_INCREMENT PRIMARY KEY
+);
+
+INSERT INTO po_number_seq (id) SELECT COALESCE(MAX(id), 0) + 1 FROM purchase_orders;
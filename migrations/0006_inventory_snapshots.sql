@@ -0,0 +1,12 @@
+-- Periodic stock snapshots: the ledger balance of every ingredient as of snapshot_at
+-- (all inventory_transactions with created_at < snapshot_at). Point-in-time stock is
+-- the nearest earlier snapshot plus the transactions after it.
+
+CREATE TABLE IF NOT EXISTS inventory_snapshots (
+    snapshot_at DATETIME NOT NULL,
+    ingredient_id INT NOT NULL,
+    stock DECIMAL(12,3) NOT NULL,
+    PRIMARY KEY (snapshot_at, ingredient_id),
+    INDEX idx_inventory_snapshots_ingredient (ingredient_id, snapshot_at),
+    CONSTRAINT fk_inventory_snapshots_ingredient FOREIGN KEY (ingredient_id) REFERENCES ingredients(id) ON DELETE CASCADE
+);
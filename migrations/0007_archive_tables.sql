@@ -0,0 +1,17 @@
+-- Archive tables for closed orders and old inventory transactions (moved by
+-- `flask --app mainapp archive`), plus *_all views that reports read to see live and
+-- archived rows together. The views expand SELECT * when created: a migration that
+-- adds a column to a live table must add it to the archive table and recreate the view.
+
+CREATE TABLE IF NOT EXISTS orders_archive LIKE orders;
+CREATE TABLE IF NOT EXISTS order_items_archive LIKE order_items;
+CREATE TABLE IF NOT EXISTS inventory_transactions_archive LIKE inventory_transactions;
+
+CREATE OR REPLACE VIEW orders_all AS
+    SELECT * FROM orders UNION ALL SELECT * FROM orders_archive;
+
+CREATE OR REPLACE VIEW order_items_all AS
+    SELECT * FROM order_items UNION ALL SELECT * FROM order_items_archive;
+
+CREATE OR REPLACE VIEW inventory_transactions_all AS
+    SELECT * FROM inventory_transactions UNION ALL SELECT * FROM inventory_transactions_archive;
@@ -0,0 +1,13 @@
+-- Stock quantities use three decimals everywhere, like recipes and inventory snapshots,
+-- so a recipe's 0.005 kg of salt is deducted and logged exactly instead of rounding to
+-- nothing (or drifting between the ledger and current_stock for larger amounts).
+
+ALTER TABLE ingredients
+    MODIFY current_stock DECIMAL(12,3) DEFAULT 0,
+    MODIFY reorder_level DECIMAL(12,3) DEFAULT 0,
+    MODIFY initial_stock DECIMAL(12,3) DEFAULT 0;
+
+ALTER TABLE inventory_transactions MODIFY quantity DECIMAL(12,3) NOT NULL;
+ALTER TABLE inventory_transactions_archive MODIFY quantity DECIMAL(12,3) NOT NULL;
+
+ALTER TABLE purchase_order_items MODIFY quantity DECIMAL(12,3) NOT NULL;
@@ -0,0 +1,4 @@
+-- Snapshots dated in the future were accepted before the API rejected them. They were
+-- computed before their own time, so they would be a wrong replay base once it passes.
+
+DELETE FROM inventory_snapshots WHERE snapshot_at > NOW();
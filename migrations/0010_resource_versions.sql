@@ -0,0 +1,11 @@
+-- Version counters for the polled listings' ETags. Every write to a listing bumps its
+-- row in the same transaction (bump_resource_versions), so an ETag changes exactly when
+-- a change to the listing commits.
+
+CREATE TABLE IF NOT EXISTS resource_versions (
+    resource VARCHAR(32) PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO resource_versions (resource) VALUES
+    ('orders'), ('ingredients'), ('purchase_orders'), ('employees');
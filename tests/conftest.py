@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def mainapp():
+    """The application module. It initializes its schema on import, so point it at a closed
+       local port first: start-up then fails fast instead of reaching a real database."""
+    pytest.importorskip('MySQLdb')
+    os.environ.update(MYSQL_HOST='127.0.0.1', MYSQL_PORT='1', MYSQL_DB='restaurant_test')
+    os.environ.pop('REDIS_URL', None)
+    import mainapp
+    return mainapp
+
+
+@pytest.fixture
+def use_connections(mainapp, monkeypatch):
+    """install(factory) routes mysql.connection through the app's ConnectionPool, opening
+       connections with factory() instead of MySQLdb.connect."""
+    def install(factory, max_size=32):
+        class Pool(mainapp.ConnectionPool):
+            def _connect(self):
+                conn = factory()
+                with self._lock:
+                    self._born[id(conn)] = mainapp.time.monotonic()
+                    self.stats['created'] += 1
+                return conn
+
+        pool = Pool({}, max_size=max_size)
+        monkeypatch.setattr(mainapp.mysql, 'pool', pool)
+        return pool
+    return install
@@ -0,0 +1,119 @@
+"""Database stand-ins for tests that run without a MySQL server."""
+import sqlite3
+
+
+class ScriptedCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        params = tuple(params or ())
+        self.conn.statements.append((sql, params))
+        columns, rows = self.conn.responder(sql, params)
+        self.description = [(c,) for c in columns] if columns else None
+        self._rows = list(rows)
+        self.rowcount = len(self._rows)
+        return self.rowcount
+
+    def executemany(self, sql, rows):
+        rows = [tuple(r) for r in rows]
+        self.conn.statements.append((sql, rows))
+        self.description = None
+        self.rowcount = len(rows)
+        return self.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class ScriptedConnection:
+    """Answers every statement with responder(sql, params) -> (columns, rows) and records
+       (sql, params) in `statements`; for checking what a view sends."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.statements = []
+
+    def cursor(self):
+        return ScriptedCursor(self)
+
+    def commit(self):
+        self.statements.append(('COMMIT', ()))
+
+    def rollback(self):
+        self.statements.append(('ROLLBACK', ()))
+
+    def ping(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(sql.replace('%s', '?'), [tuple(r) for r in rows])
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """MySQLdb-style connection ('%s' placeholders) to a SQLite file, so concurrent
+       requests really contend for rows. Only for the portable statements the stock views
+       send (UPDATE ... WHERE, SELECT, INSERT); MySQL-only syntax fails."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        pass
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+
+import pytest
+
+from date_ranges import day_range, month_range, parse_date_arg
+
+
+def within(moment, bounds):
+    start, end = bounds
+    return start <= moment < end
+
+
+def test_day_range_covers_whole_day_and_excludes_next_midnight():
+    bounds = day_range(date(2025, 3, 14))
+    assert bounds == (datetime(2025, 3, 14), datetime(2025, 3, 15))
+    assert within(datetime(2025, 3, 14, 0, 0, 0), bounds)
+    assert within(datetime(2025, 3, 14, 23, 59, 59, 999999), bounds)
+    assert not within(datetime(2025, 3, 15, 0, 0, 0), bounds)
+    assert not within(datetime(2025, 3, 13, 23, 59, 59), bounds)
+
+
+def test_day_range_truncates_datetimes():
+    assert day_range(datetime(2025, 3, 14, 18, 30)) == (datetime(2025, 3, 14), datetime(2025, 3, 15))
+
+
+def test_day_range_inclusive_end_date():
+    assert day_range(date(2025, 3, 1), date(2025, 3, 31)) == (datetime(2025, 3, 1), datetime(2025, 4, 1))
+
+
+def test_day_range_leap_day():
+    assert day_range(date(2024, 2, 29)) == (datetime(2024, 2, 29), datetime(2024, 3, 1))
+    assert day_range(date(2024, 2, 28)) == (datetime(2024, 2, 28), datetime(2024, 2, 29))
+
+
+def test_day_range_year_end():
+    assert day_range(date(2024, 12, 31)) == (datetime(2024, 12, 31), datetime(2025, 1, 1))
+
+
+def test_month_range_february():
+    leap = month_range(date(2024, 2, 10))
+    assert leap == (datetime(2024, 2, 1), datetime(2024, 3, 1))
+    assert within(datetime(2024, 2, 29, 23, 59, 59), leap)
+    assert not within(datetime(2024, 3, 1), leap)
+    assert month_range(date(2023, 2, 10)) == (datetime(2023, 2, 1), datetime(2023, 3, 1))
+
+
+def test_month_range_december_rolls_over_to_january():
+    bounds = month_range(date(2024, 12, 15))
+    assert bounds == (datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert within(datetime(2024, 12, 31, 23, 59, 59), bounds)
+    assert not within(datetime(2025, 1, 1), bounds)
+
+
+def test_month_range_january():
+    assert month_range(date(2025, 1, 31)) == (datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (date(2025, 1, 20), date(2025, 3, 2), (datetime(2025, 1, 1), datetime(2025, 4, 1))),
+    (date(2024, 11, 5), date(2025, 2, 10), (datetime(2024, 11, 1), datetime(2025, 3, 1))),
+    (date(2024, 10, 1), date(2024, 12, 31), (datetime(2024, 10, 1), datetime(2025, 1, 1))),
+    (date(2024, 1, 1), date(2024, 12, 1), (datetime(2024, 1, 1), datetime(2025, 1, 1))),
+])
+def test_month_range_multiple_months(start, end, expected):
+    assert month_range(start, end) == expected
+
+
+def test_parse_date_arg():
+    assert parse_date_arg('2024-02-29') == date(2024, 2, 29)
+    assert parse_date_arg('2024-12', '%Y-%m') == date(2024, 12, 1)
+    assert parse_date_arg('') is None
+    assert parse_date_arg(None) is None
+
+
+@pytest.mark.parametrize("value", ['2023-02-29', '2024-13-01', '29/02/2024', 'today'])
+def test_parse_date_arg_rejects_malformed_dates(value):
+    with pytest.raises(ValueError):
+        parse_date_arg(value)
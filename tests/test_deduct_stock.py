@@ -0,0 +1,30 @@
+from fakedb import ScriptedConnection
+
+
+def ingredients(stock):
+    def responder(sql, params):
+        if 'FOR UPDATE' in sql:
+            return ['id', 'name', 'current_stock'], [(i, f"ingredient {i}", stock[i]) for i in params if i in stock]
+        return [], []
+    return responder
+
+
+def test_batch_lines_summing_to_the_stock_are_not_refused(mainapp):
+    conn = ScriptedConnection(ingredients({7: 0.3}))
+    usage = [(7, 0.1, 'prep'), (7, 0.2, 'prep')]
+
+    assert mainapp.deduct_stock(conn.cursor(), usage, created_by=1) == []
+
+    update = next(params for sql, params in conn.statements if sql.lstrip().startswith('UPDATE'))
+    assert list(update) == [7, 0.3]
+
+
+def test_shortfall_reports_the_rounded_total(mainapp):
+    conn = ScriptedConnection(ingredients({7: 0.3}))
+    usage = [(7, 0.1, 'prep'), (7, 0.2, 'prep'), (7, 0.001, 'prep')]
+
+    shortfalls = mainapp.deduct_stock(conn.cursor(), usage, created_by=1)
+
+    assert shortfalls == [{"id": 7, "name": "ingredient 7", "requested": 0.301, "available": 0.3,
+                           "reason": "insufficient"}]
+    assert not any(sql.lstrip().startswith(('UPDATE', 'INSERT')) for sql, _ in conn.statements)
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from fakedb import ScriptedConnection
+
+T0 = datetime(2025, 3, 14, 12, 0, 0)
+
+
+class OrdersTable:
+    """Committed orders plus a database clock, answering the changes-feed queries."""
+
+    def __init__(self, mainapp):
+        self.columns = [c.strip() for c in mainapp.ORDER_LIST_COLUMNS.split(',')]
+        self.lag = timedelta(seconds=mainapp.ORDER_CHANGES_LAG)
+        self.now = T0
+        self.rows = []
+
+    def commit(self, order_id, updated_at, status='placed'):
+        row = dict.fromkeys(self.columns)
+        row.update(id=order_id, current_status=status, created_at=updated_at, updated_at=updated_at)
+        self.rows.append(row)
+
+    def responder(self, sql, params):
+        if 'MAX(updated_at)' in sql:
+            latest = max((r['updated_at'] for r in self.rows), default=None)
+            return ['latest', 'horizon'], [(latest, self.now - self.lag)]
+        if 'FROM orders WHERE updated_at >=' in sql:
+            since, limit = params
+            rows = sorted((r for r in self.rows if r['updated_at'] >= since), key=lambda r: (r['updated_at'], r['id']))
+            return self.columns, [tuple(r[c] for c in self.columns) for r in rows[:limit]]
+        if 'FROM order_items' in sql:
+            return ['id', 'order_id'], []
+        raise AssertionError(f"unexpected statement: {sql}")
+
+
+@pytest.fixture
+def orders(mainapp, use_connections):
+    table = OrdersTable(mainapp)
+    use_connections(lambda: ScriptedConnection(table.responder))
+    return table
+
+
+def poll(mainapp, since):
+    resp = mainapp.app.test_client().get('/chef/orders/changes', query_string={'status': 'all', 'since': since})
+    assert resp.status_code == 200, resp.get_data()
+    body = resp.get_json()
+    return [o['id'] for o in body['orders']], body['watermark']
+
+
+def test_late_committing_order_is_still_delivered(mainapp, orders):
+    # order 2 was stamped at 12:00:18 but its transaction commits only after order 1
+    # (stamped 12:00:20) has already been polled
+    orders.now = T0 + timedelta(seconds=21)
+    orders.commit(1, T0 + timedelta(seconds=20))
+    ids, watermark = poll(mainapp, T0.isoformat())
+    assert ids == [1]
+    assert datetime.fromisoformat(watermark) <= T0 + timedelta(seconds=18)
+
+    orders.now = T0 + timedelta(seconds=22)
+    orders.commit(2, T0 + timedelta(seconds=18))
+    ids, _ = poll(mainapp, watermark)
+    assert 2 in ids
+
+
+def test_watermark_catches_up_once_writes_settle(mainapp, orders):
+    orders.commit(1, T0 + timedelta(seconds=20))
+    orders.now = T0 + timedelta(minutes=5)
+    ids, watermark = poll(mainapp, T0.isoformat())
+    assert ids == [1]
+    assert watermark == (T0 + timedelta(seconds=20)).isoformat()
+
+    ids, watermark = poll(mainapp, watermark)
+    assert ids == [1]  # the inclusive bound repeats the newest second; clients merge by id
+    assert watermark == (T0 + timedelta(seconds=20)).isoformat()
+
+
+def test_watermark_without_since_lags_the_clock(mainapp, orders):
+    orders.now = T0 + timedelta(seconds=21)
+    orders.commit(1, T0 + timedelta(seconds=20))
+    resp = mainapp.app.test_client().get('/chef/orders/changes')
+    assert resp.get_json()['watermark'] == (T0 + timedelta(seconds=11)).isoformat()
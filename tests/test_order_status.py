@@ -0,0 +1,106 @@
+import pytest
+
+from fakedb import ScriptedConnection
+
+RECIPES = {'Pasta': {7: 0.2}, 'Salad': {8: 0.1}}
+
+
+class Kitchen:
+    """One order (two Pasta) and the stock / ledger queries around a status change."""
+
+    def __init__(self, stock, deducted_at=None, ledger=()):
+        self.stock = stock
+        self.deducted_at = deducted_at
+        self.ledger = list(ledger)  # (ingredient_id, signed quantity) for "Order #1"
+
+    def responder(self, sql, params):
+        if 'FROM orders WHERE id = %s FOR UPDATE' in sql:
+            return ['current_status', 'stock_deducted_at'], [('placed', self.deducted_at)]
+        if 'FROM order_items' in sql:
+            return ['item_name', 'qty'], [('Pasta', 2)]
+        if 'FROM ingredients' in sql and 'FOR UPDATE' in sql:
+            return ['id', 'name', 'current_stock'], [(i, f"ingredient {i}", self.stock[i]) for i in params if i in self.stock]
+        if 'FROM inventory_transactions' in sql:
+            totals = {}
+            for ingredient_id, qty in self.ledger:
+                totals[ingredient_id] = totals.get(ingredient_id, 0) + qty
+            return ['ingredient_id', 'net'], list(totals.items())
+        return [], []
+
+
+@pytest.fixture
+def kitchen(mainapp, use_connections, monkeypatch):
+    monkeypatch.setattr(mainapp.recipe_matrix, 'snapshot', lambda: RECIPES)
+    connections = []
+
+    def open_kitchen(**state):
+        k = Kitchen(**state)
+
+        def connect():
+            connections.append(ScriptedConnection(k.responder))
+            return connections[-1]
+        use_connections(connect)
+        k.statements = lambda: [st for conn in connections for st in conn.statements]
+        return k
+    return open_kitchen
+
+
+def update_status(mainapp, new_status):
+    resp = mainapp.app.test_client().post('/chef/update_order_status', json={"order_id": 1, "new_status": new_status})
+    return resp.status_code, resp.get_json()
+
+
+def status_update(statements):
+    return next(sql for sql, _ in statements if sql.startswith('UPDATE orders SET current_status'))
+
+
+def writes_to_stock(statements):
+    return [(sql, params) for sql, params in statements if sql.lstrip().startswith(('UPDATE ingredients', 'INSERT INTO inventory'))]
+
+
+def test_preparing_deducts_and_stamps_the_order(mainapp, kitchen):
+    k = kitchen(stock={7: 5.0})
+    code, body = update_status(mainapp, 'preparing')
+    assert code == 200 and 'shortfalls' not in body
+    assert 'stock_deducted_at = NOW()' in status_update(k.statements())
+    assert len(writes_to_stock(k.statements())) == 2
+
+
+def test_order_without_recipes_is_not_marked_deducted(mainapp, kitchen, monkeypatch):
+    monkeypatch.setattr(mainapp.recipe_matrix, 'snapshot', lambda: {})
+    k = kitchen(stock={7: 5.0})
+    code, _ = update_status(mainapp, 'preparing')
+    assert code == 200
+    assert 'stock_deducted_at' not in status_update(k.statements())
+    assert writes_to_stock(k.statements()) == []
+
+
+def test_shortfall_is_reported_but_does_not_block_the_status_change(mainapp, kitchen):
+    k = kitchen(stock={7: 0.3})
+    code, body = update_status(mainapp, 'preparing')
+    assert code == 200 and body['success']
+    assert body['shortfalls'] == [{"id": 7, "name": "ingredient 7", "requested": 0.4, "available": 0.3,
+                                   "reason": "insufficient"}]
+    assert 'stock_deducted_at' not in status_update(k.statements())
+    assert writes_to_stock(k.statements()) == []
+    assert ('COMMIT', ()) in k.statements()
+
+
+def test_cancelling_a_deducted_order_puts_the_stock_back(mainapp, kitchen):
+    k = kitchen(stock={7: 5.0}, deducted_at='2025-03-14 12:00:00', ledger=[(7, -0.4)])
+    code, _ = update_status(mainapp, 'cancelled')
+    assert code == 200
+    assert 'stock_deducted_at = NULL' in status_update(k.statements())
+    (update_sql, update_params), (insert_sql, insert_rows) = writes_to_stock(k.statements())
+    assert '+ d.qty' in update_sql and list(update_params) == [7, 0.4]
+    assert insert_rows == [(7, 'adjustment', 0.4, 'Order #1', 1)]
+
+
+def test_cancel_restores_only_the_net_of_earlier_cancellations(mainapp, kitchen):
+    # deducted, cancelled (restored), re-opened and deducted again
+    k = kitchen(stock={7: 5.0}, deducted_at='2025-03-14 12:30:00', ledger=[(7, -0.4), (7, 0.4), (7, -0.4)])
+    code, _ = update_status(mainapp, 'cancelled')
+    assert code == 200
+    (_, update_params), (_, insert_rows) = writes_to_stock(k.statements())
+    assert list(update_params) == [7, 0.4]
+    assert insert_rows == [(7, 'adjustment', 0.4, 'Order #1', 1)]
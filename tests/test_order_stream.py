@@ -0,0 +1,17 @@
+def test_streams_beyond_the_cap_are_refused_until_one_closes(mainapp, monkeypatch):
+    monkeypatch.setitem(mainapp.app.config, 'STREAM_MAX_SUBSCRIBERS', 2)
+    client = mainapp.app.test_client()
+
+    streams = [client.get('/stream/orders') for _ in range(2)]
+    assert [r.status_code for r in streams] == [200, 200]
+
+    refused = client.get('/stream/orders')
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '60'
+
+    streams[0].close()
+    again = client.get('/stream/orders')
+    assert again.status_code == 200
+    for response in (again, streams[1]):
+        response.close()
+    assert not mainapp.order_events._subscribers
@@ -0,0 +1,106 @@
+"""The invariants of benchmarks/stress_stock.py, run against a SQLite file instead of
+MySQL: many threads send /use and /restock for one ingredient through the real views
+and the app's pool. Quantities are exact in binary, so float sums can be compared."""
+import random
+import sqlite3
+import threading
+from decimal import Decimal
+
+import pytest
+
+from fakedb import SqliteConnection
+
+USE_QUANTITIES = ['0.125', '0.25', '1', '2.5']
+RESTOCK_QUANTITIES = ['1', '2', '4.125']
+START_STOCK = Decimal('20')
+THREADS = 16
+OPS = 60
+
+SCHEMA = """
+    CREATE TABLE ingredients (id INTEGER PRIMARY KEY, name TEXT, current_stock REAL, unit TEXT,
+                              reorder_level REAL, initial_stock REAL);
+    CREATE TABLE inventory_transactions (id INTEGER PRIMARY KEY, ingredient_id INTEGER,
+                                         transaction_type TEXT, quantity REAL, note TEXT,
+                                         created_by INTEGER, created_at TEXT DEFAULT CURRENT_TIMESTAMP);
+    CREATE TABLE resource_versions (resource TEXT PRIMARY KEY, version INTEGER);
+    INSERT INTO resource_versions VALUES ('ingredients', 1);
+"""
+
+
+@pytest.fixture
+def database(tmp_path, use_connections):
+    path = str(tmp_path / 'stock.db')
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO ingredients VALUES (1, 'flour', ?, 'kg', 0, ?)", (float(START_STOCK),) * 2)
+    conn.commit()
+    conn.close()
+    use_connections(lambda: SqliteConnection(path), max_size=THREADS)
+    return path
+
+
+def worker(mainapp, seed, totals, problems, lock):
+    rng = random.Random(seed)
+    client = mainapp.app.test_client()
+    used, restocked, refused = Decimal(0), Decimal(0), 0
+    for _ in range(OPS):
+        if rng.random() < 0.8:
+            qty = rng.choice(USE_QUANTITIES)
+            resp = client.post('/api/ingredients/1/use', json={"quantity": float(qty)})
+            body = resp.get_json()
+            if resp.status_code == 200:
+                used += Decimal(qty)
+            elif resp.status_code == 400 and body.get('message') == 'Insufficient stock':
+                refused += 1
+            else:
+                problems.append(f"use {qty}: {resp.status_code} {body}")
+        else:
+            qty = rng.choice(RESTOCK_QUANTITIES)
+            resp = client.post('/api/ingredients/1/restock', json={"quantity": float(qty)})
+            body = resp.get_json()
+            if resp.status_code == 200:
+                restocked += Decimal(qty)
+            else:
+                problems.append(f"restock {qty}: {resp.status_code} {body}")
+        stock = body.get('new_stock', body.get('current_stock')) if body else None
+        if stock is not None and stock < 0:
+            problems.append(f"negative stock in a response: {stock}")
+    with lock:
+        totals['used'] += used
+        totals['restocked'] += restocked
+        totals['refused'] += refused
+
+
+def monitor(path, stop, readings):
+    conn = sqlite3.connect(path)
+    while not stop.is_set():
+        readings.append(conn.execute("SELECT current_stock FROM ingredients WHERE id = 1").fetchone()[0])
+    conn.close()
+
+
+def test_concurrent_use_and_restock_keep_stock_and_ledger_consistent(mainapp, database):
+    totals = {'used': Decimal(0), 'restocked': Decimal(0), 'refused': 0}
+    problems, readings, lock, stop = [], [], threading.Lock(), threading.Event()
+    watcher = threading.Thread(target=monitor, args=(database, stop, readings))
+    workers = [threading.Thread(target=worker, args=(mainapp, n, totals, problems, lock)) for n in range(THREADS)]
+    watcher.start()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    stop.set()
+    watcher.join()
+
+    conn = sqlite3.connect(database)
+    final = conn.execute("SELECT current_stock FROM ingredients WHERE id = 1").fetchone()[0]
+    ledger = conn.execute(
+        f"SELECT COALESCE(SUM({mainapp.LEDGER_SIGNED_QTY}), 0) FROM inventory_transactions t WHERE t.ingredient_id = 1"
+    ).fetchone()[0]
+    conn.close()
+
+    assert problems == []
+    assert totals['used'] > 0 and totals['restocked'] > 0 and totals['refused'] > 0
+    assert Decimal(final) == START_STOCK + totals['restocked'] - totals['used']
+    assert Decimal(ledger) == totals['restocked'] - totals['used']
+    assert readings and min(readings) >= 0